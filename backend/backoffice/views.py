@@ -86,7 +86,7 @@ class CouponIn(serializers.ModelSerializer):
         # normalize code to UPPER
         code = attrs.get("code")
         if code:
-            attrs["code"] = code.strip().upper()
+            attrs["code"] = Coupon.normalize_code(code)
         return super().validate(attrs)
 
 
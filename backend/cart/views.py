@@ -210,7 +210,8 @@ class ApplyCouponView(APIView):
 
         # Lookup active coupon
         try:
-            coupon = Coupon.objects.active().get(code__iexact=code)
+            # exact match on the stored form can use the unique index; iexact can't
+            coupon = Coupon.objects.active().get(code=Coupon.normalize_code(code))
         except Coupon.DoesNotExist:
             log.warning("coupon_invalid code=%s cart=%s", code, cart.id)
             return Response({"detail": "Invalid or expired coupon."}, status=400)
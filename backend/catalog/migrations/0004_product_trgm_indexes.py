@@ -0,0 +1,43 @@
+# Trigram GIN indexes so /search's icontains filters can use an index on Postgres.
+# Django compiles icontains/istartswith to UPPER(col) LIKE UPPER(%s), so the
+# indexes are on UPPER(col). Other backends (sqlite in dev) have no pg_trgm: no-op.
+# No description index: on Postgres, /search q matches description through the
+# search_vector (0005), and a trigram index over long text is costly to write.
+
+from django.db import migrations
+
+_TRGM_COLUMNS = ("name", "brand")
+
+
+def _index_name(column: str) -> str:
+    return f"catalog_product_{column}_trgm"
+
+
+def add_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = apps.get_model("catalog", "Product")._meta.db_table
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in _TRGM_COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{_index_name(column)}" '
+            f'ON "{table}" USING gin (UPPER("{column}") gin_trgm_ops)'
+        )
+
+
+def drop_trgm_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for column in _TRGM_COLUMNS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{_index_name(column)}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_inventory_expected_restock_date_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_trgm_indexes, drop_trgm_indexes),
+    ]
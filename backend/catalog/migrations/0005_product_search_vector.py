@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:59
+
+from django.db import migrations
+
+# Postgres-only search_vector column, kept current with the built-in
+# tsvector_update_trigger and GIN-indexed for /search. It is not a model field
+# (Product reads never load it). Other backends: no-op.
+
+
+def add_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = apps.get_model("catalog", "Product")._meta.db_table
+    schema_editor.execute(f'ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS "search_vector" tsvector NULL')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS "catalog_product_search_vector_gin" '
+        f'ON "{table}" USING gin ("search_vector")'
+    )
+    schema_editor.execute(
+        f'CREATE TRIGGER "catalog_product_search_vector_tg" '
+        f'BEFORE INSERT OR UPDATE ON "{table}" '
+        f"FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger("
+        f"search_vector, 'pg_catalog.english', name, brand, description)"
+    )
+    # backfill existing rows
+    schema_editor.execute(
+        f'UPDATE "{table}" SET "search_vector" = to_tsvector('
+        f"'pg_catalog.english', coalesce(name, '') || ' ' || coalesce(brand, '') || ' ' || coalesce(description, ''))"
+    )
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    table = apps.get_model("catalog", "Product")._meta.db_table
+    schema_editor.execute(f'DROP TRIGGER IF EXISTS "catalog_product_search_vector_tg" ON "{table}"')
+    schema_editor.execute('DROP INDEX IF EXISTS "catalog_product_search_vector_gin"')
+    schema_editor.execute(f'ALTER TABLE "{table}" DROP COLUMN IF EXISTS "search_vector"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_product_trgm_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_trigger, drop_search_trigger),
+    ]
@@ -75,6 +75,10 @@ class Product(models.Model):
     category = models.ForeignKey(Category, related_name="products", on_delete=models.PROTECT)
     brand = models.CharField(max_length=120, blank=True)
     status = models.CharField(max_length=30, choices=Status.choices, default=Status.ACTIVE, db_index=True)
+    # On Postgres the table also has a search_vector tsvector column (name/brand/
+    # description), kept current by a DB trigger and GIN-indexed (migration 0005).
+    # It is deliberately not a model field, so ordinary Product reads and joins
+    # never load it; only /search references it.
 
     class Meta:
         indexes = [
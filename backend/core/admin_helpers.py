@@ -0,0 +1,8 @@
+# core/admin_helpers.py
+from __future__ import annotations
+
+
+def is_changelist(request) -> bool:
+    """True when the admin request is for a model's changelist (list) page."""
+    match = getattr(request, "resolver_match", None)
+    return bool(match and (match.url_name or "").endswith("_changelist"))
@@ -0,0 +1,30 @@
+# core/jsoncodec.py
+from __future__ import annotations
+
+import json
+
+try:
+    import orjson  # optional: C-accelerated encode/decode
+except Exception:  # pragma: no cover
+    orjson = None
+
+
+class OrjsonEncoder(json.JSONEncoder):
+    """
+    JSONField encoder backed by orjson (falls back to stdlib json when missing).
+    Unknown types are stringified, mirroring `default=str`.
+    """
+
+    def encode(self, o) -> str:
+        if orjson is None:
+            return json.dumps(o, default=str, ensure_ascii=False)
+        return orjson.dumps(o, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+class OrjsonDecoder(json.JSONDecoder):
+    """JSONField decoder backed by orjson (falls back to stdlib json when missing)."""
+
+    def decode(self, s, *args, **kwargs):
+        if orjson is None:
+            return super().decode(s, *args, **kwargs)
+        return orjson.loads(s)
@@ -0,0 +1,40 @@
+# core/renderers.py
+from __future__ import annotations
+
+try:
+    import orjson  # optional: C-accelerated JSON rendering
+except Exception:  # pragma: no cover
+    orjson = None
+
+from rest_framework import renderers
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+# Same fallbacks as DRF's renderer (Decimal, lazy strings, querysets, ...)
+_drf_default = encoders.JSONEncoder().default
+
+_ORJSON_OPTIONS = (
+    # datetimes go through DRF's encoder so ms precision / "Z" suffix stay identical
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    Drop-in JSONRenderer that encodes with orjson when installed.
+    Output matches the stock renderer for the default compact/unicode settings;
+    indented (browsable/?indent=) or non-default configs use the stock path.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or not (api_settings.COMPACT_JSON and api_settings.UNICODE_JSON)
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_drf_default, option=_ORJSON_OPTIONS)
+        # Like DRF: escape U+2028/U+2029 so the output is also valid JavaScript
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
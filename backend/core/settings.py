@@ -123,6 +123,20 @@ if DATABASE_URL:
     except Exception:
         pass  # fall back to sqlite
 
+# Shared cache (reports etc.) when REDIS_URL is set; otherwise Django's per-process default
+REDIS_URL = os.getenv("REDIS_URL", "").strip()
+if REDIS_URL:
+    try:
+        import redis  # noqa: F401  # required by RedisCache
+        CACHES = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": REDIS_URL,
+            }
+        }
+    except Exception:
+        pass  # fall back to local-memory cache
+
 # -----------------------------------------------------------------------------
 # Auth / i18n
 # -----------------------------------------------------------------------------
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:35
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_event_hash(apps, schema_editor):
+    PaymentIdempotency = apps.get_model("orders", "PaymentIdempotency")
+    for row in PaymentIdempotency.objects.only("id", "event_id").iterator():
+        digest = hashlib.blake2b(str(row.event_id).encode("utf-8"), digest_size=8).digest()
+        row.event_hash = int.from_bytes(digest, "big", signed=True)
+        row.save(update_fields=["event_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_address_orders_addr_postal__eb4cb8_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentidempotency',
+            name='event_hash',
+            field=models.BigIntegerField(null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_event_hash, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='paymentidempotency',
+            name='event_hash',
+            field=models.BigIntegerField(unique=True),
+        ),
+        migrations.AlterField(
+            model_name='paymentidempotency',
+            name='event_id',
+            field=models.CharField(max_length=120),
+        ),
+        migrations.AddIndex(
+            model_name='paymentidempotency',
+            index=models.Index(fields=['received_at'], name='orders_paym_receive_55b802_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_paymentidempotency_event_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at', 'status'], name='order_created_status_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-15 23:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_created_status_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='paymentidempotency',
+            name='orders_paym_event_i_843d75_idx',
+        ),
+    ]
@@ -1,5 +1,6 @@
+import hashlib
 from decimal import Decimal
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 
@@ -83,6 +84,8 @@ class Order(models.Model):
         indexes = [
             models.Index(fields=["email", "created_at"]),
             models.Index(fields=["status", "created_at"]),
+            # reports: created_at window, then status split
+            models.Index(fields=["created_at", "status"], name="order_created_status_idx"),
             models.Index(fields=["payment_reference"]),
             models.Index(fields=["tracking_number"]),
         ]
@@ -105,7 +108,11 @@ class Order(models.Model):
     def can_transition(self, new_status: str) -> bool:
         return new_status in self.ALLOWED_TRANSITIONS.get(self.status, set())
 
-    def transition(self, new_status: str, *, actor: str = "", note: str = ""):
+    def transition(self, new_status: str, *, actor: str = "", note: str = "", extra_fields=()):
+        """
+        Move to `new_status` and persist it. `extra_fields` names other attributes
+        already set on the instance that should go out in the same UPDATE.
+        """
         if not self.can_transition(new_status):
             raise ValueError(f"Invalid transition {self.status} → {new_status}")
         prev = self.status
@@ -127,6 +134,7 @@ class Order(models.Model):
                 "delivered_at",
                 "cancelled_at",
                 "updated_at",
+                *extra_fields,
             ]
         )
         OrderEvent.log(self, "transition", f"{prev} → {new_status}", actor=actor, note=note)
@@ -204,11 +212,34 @@ class OrderEvent(models.Model):
 
 # --- Idempotency for payment webhooks ---
 class PaymentIdempotency(models.Model):
-    """Simple idempotency record for processed gateway events."""
-    event_id = models.CharField(max_length=120, unique=True)
+    """
+    Idempotency record for processed gateway events.
+    Duplicates are detected on `event_hash` (a 64-bit digest of event_id computed
+    server-side) so the unique check is an integer index probe, not a string one.
+    """
+    event_hash = models.BigIntegerField(unique=True)
+    event_id = models.CharField(max_length=120)
     received_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
-        indexes = [models.Index(fields=["event_id"])]
+        indexes = [
+            # no event_id index: look events up by event_hash (hash_event_id)
+            models.Index(fields=["received_at"]),  # pruning old rows
+        ]
         verbose_name = "Payment Idempotency"
         verbose_name_plural = "Payment Idempotency"
+
+    @staticmethod
+    def hash_event_id(event_id) -> int:
+        digest = hashlib.blake2b(str(event_id).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big", signed=True)
+
+    @classmethod
+    def claim(cls, event_id) -> bool:
+        """Record `event_id`; return False if it was already processed."""
+        try:
+            with transaction.atomic():
+                cls.objects.create(event_hash=cls.hash_event_id(event_id), event_id=str(event_id))
+        except IntegrityError:
+            return False
+        return True
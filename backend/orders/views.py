@@ -1,14 +1,20 @@
 # orders/views.py
 from __future__ import annotations
 
-import base64
 import hashlib
 import hmac
+import json
 from decimal import Decimal
-from typing import Dict, Optional, Tuple
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import orjson  # optional: faster encoding for streamed lists
+except Exception:  # pragma: no cover
+    orjson = None
 
 from django.conf import settings
-from django.db import transaction, IntegrityError
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.utils.encoding import force_bytes
@@ -23,7 +29,7 @@ from rest_framework.throttling import ScopedRateThrottle
 from drf_spectacular.utils import extend_schema
 
 from catalog.models import ProductVariant, Inventory
-from promotions.models import Coupon
+from promotions.models import Coupon, coupon_id_for_code, forget_coupon_id
 from .models import (
     Order, OrderItem, Address,
     ReturnRequest, ReturnRequestAttachment, OrderEvent,
@@ -35,17 +41,49 @@ from .serializers import (
     ReturnAttachmentInSerializer, ReturnAttachmentOutSerializer,
 )
 from orders.pricing import price_cart, _to_decimal, _round2
+from cart.models import Cart, CartItem
 from cart.views import _get_or_create_cart
 from .validation import validate_coupon_for_cart
 
 
+# ---------- Constants ----------
+
+# Backorder policies that accept qty beyond stock ('notify' behaves like 'allow')
+_BACKORDER_ALLOW = frozenset({"allow", "notify"})
+_RETURNABLE_STATUSES = frozenset({Order.Status.PAID, Order.Status.DELIVERED})
+_REFUNDABLE_STATUSES = frozenset({Order.Status.PAID, Order.Status.DELIVERED, Order.Status.RETURNED})
+
+
+def _redeem_order_coupon(order: Order) -> None:
+    """Record a redemption for the order's coupon (if any) once it is paid."""
+    code = Coupon.normalize_code(order.coupon_code)
+    if not code:
+        return
+    try:
+        # redeem() only needs pk + code (conditional UPDATE), so an unsaved instance is enough
+        pk = coupon_id_for_code(code)
+        if Coupon(pk=pk, code=code).redeem(email=order.email, order_id=order.id):
+            return
+        # 0 rows: exhausted, or a stale cached id (coupon deleted/renamed meanwhile)
+        forget_coupon_id(code)
+        fresh = coupon_id_for_code(code)
+        if fresh != pk:
+            Coupon(pk=fresh, code=code).redeem(email=order.email, order_id=order.id)
+    except Coupon.DoesNotExist:
+        OrderEvent.log(order, "coupon_missing", f"Coupon not found at redeem: {code}")
+
+
 # ---------- Image helpers ----------
 
 def _safe_filefield_url(f) -> str:
     """Return a FileField/FieldFile URL if resolvable, else empty string."""
+    # Empty FieldFile is the common miss; check the name instead of catching ValueError
+    if not getattr(f, "name", None):
+        return ""
     try:
         return f.url
     except Exception:
+        # storage backend failures (misconfigured S3 etc.)
         return ""
 
 
@@ -192,6 +230,38 @@ def _serialize_order(order: Order, request=None) -> dict:
     }
 
 
+def _json_default(v):
+    # Mirror DRF's JSONEncoder, which emits raw Decimals as floats
+    if isinstance(v, Decimal):
+        return float(v)
+    return str(v)
+
+
+def _json_bytes(obj) -> bytes:
+    """Encode one payload the same way Response(data) would render it."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default)
+    return json.dumps(obj, default=_json_default, ensure_ascii=False).encode("utf-8")
+
+
+def _stream_orders(orders, request) -> StreamingHttpResponse:
+    """
+    Stream a JSON array of serialized orders without materializing the list.
+    Rows are pulled in chunks (items still prefetched per chunk).
+    """
+    def gen() -> Iterable[bytes]:
+        yield b"["
+        first = True
+        for o in orders.iterator(chunk_size=100):
+            if not first:
+                yield b","
+            first = False
+            yield _json_bytes(_serialize_order(o, request))
+        yield b"]"
+
+    return StreamingHttpResponse(gen(), content_type="application/json", status=200)
+
+
 def _get_order_for_returns(request, pk: int) -> Optional[Order]:
     """
     Resolve an order for return operations.
@@ -238,7 +308,7 @@ class CheckoutView(APIView):
                 cart.save(update_fields=["applied_coupon"])
         else:
             try:
-                coupon = Coupon.objects.active().get(code__iexact=req_code)
+                coupon = Coupon.objects.active().get(code=Coupon.normalize_code(req_code))
                 cart.applied_coupon = coupon
                 cart.save(update_fields=["applied_coupon"])
             except Coupon.DoesNotExist:
@@ -254,18 +324,18 @@ class CheckoutView(APIView):
             except ShippingMethod.DoesNotExist:
                 return Response({"detail": "Invalid shipping method."}, status=400)
 
-        # Variants
-        variant_ids = list(cart.items.values_list("variant_id", flat=True))
+        # Cart lines + variants (inventory is 1:1, so JOIN it rather than prefetch)
+        cart_items = list(cart.items.all())
+        variant_ids = [ci.variant_id for ci in cart_items]
         variants = (
             ProductVariant.objects
-            .select_related("product")
-            .prefetch_related("inventory")
+            .select_related("product", "inventory")
             .filter(id__in=variant_ids)
         )
         vmap: Dict[int, ProductVariant] = {v.id: v for v in variants}
 
         # Stock pre-check (non-locking pass for quick failures)
-        for ci in cart.items.all():
+        for ci in cart_items:
             v = vmap.get(ci.variant_id)
             if not v:
                 return Response({"detail": f"Variant {ci.variant_id} not found."}, status=400)
@@ -273,7 +343,7 @@ class CheckoutView(APIView):
             stock = getattr(inv, "qty_available", 0)
             backorder = getattr(inv, "backorder_policy", "block")
             # treat 'notify' like 'allow' here
-            if backorder not in {"allow", "notify"} and ci.qty > stock:
+            if backorder not in _BACKORDER_ALLOW and ci.qty > stock:
                 return Response({"detail": f"Insufficient stock for {v.sku}. Available: {stock}."}, status=400)
 
         # Totals & coupon validation
@@ -287,10 +357,10 @@ class CheckoutView(APIView):
             inv_qs = Inventory.objects.select_for_update().filter(variant_id__in=variant_ids)
             inv_map: Dict[int, Inventory] = {inv.variant_id: inv for inv in inv_qs}
 
-            for ci in cart.items.all():
+            for ci in cart_items:
                 inv = inv_map.get(ci.variant_id)
                 # treat 'notify' like 'allow' in the locked pass too
-                if inv and inv.backorder_policy not in {"allow", "notify"} and ci.qty > inv.qty_available:
+                if inv and inv.backorder_policy not in _BACKORDER_ALLOW and ci.qty > inv.qty_available:
                     return Response(
                         {"detail": f"Insufficient stock for item {ci.variant_id}."},
                         status=status.HTTP_409_CONFLICT,
@@ -311,7 +381,7 @@ class CheckoutView(APIView):
             )
 
             # Items (+ image snapshot)
-            for it in cart.items.select_related("variant", "variant__product"):
+            for it in cart_items:
                 v = vmap[it.variant_id]
                 unit_price = _to_decimal(it.price_at_add or v.price_sale or v.price_mrp)
                 line_total = _round2(unit_price * it.qty)
@@ -333,7 +403,7 @@ class CheckoutView(APIView):
 
                 inv = inv_map.get(v.id)
                 # only decrement when backorders are NOT allowed/notify
-                if inv and inv.backorder_policy not in {"allow", "notify"}:
+                if inv and inv.backorder_policy not in _BACKORDER_ALLOW:
                     if it.qty > inv.qty_available:
                         # Race detected between pre-check and locked pass
                         return Response(
@@ -343,10 +413,10 @@ class CheckoutView(APIView):
                     inv.qty_available = inv.qty_available - it.qty
                     inv.save(update_fields=["qty_available"])
 
-            # Clear cart
-            cart.items.all().delete()
+            # Clear cart (straight DELETE + UPDATE, no instance load)
+            CartItem.objects.filter(cart_id=cart.pk).delete()
+            Cart.objects.filter(pk=cart.pk).update(applied_coupon=None)
             cart.applied_coupon = None
-            cart.save(update_fields=["applied_coupon"])
 
             OrderEvent.log(order, "created", "Order created via checkout")
 
@@ -373,8 +443,7 @@ class OrderListView(APIView):
             .order_by("-id")
             .prefetch_related("items")
         )
-        data = [_serialize_order(o, request) for o in orders]
-        return Response(data, status=200)
+        return _stream_orders(orders, request)
 
 
 class OrderDetailView(APIView):
@@ -416,8 +485,7 @@ class MyOrdersView(APIView):
             .order_by("-id")
             .prefetch_related("items")
         )
-        data = [_serialize_order(o, request) for o in orders]
-        return Response(data, status=200)
+        return _stream_orders(orders, request)
 
 
 class MyOrderDetailView(APIView):
@@ -455,7 +523,7 @@ class ReturnRequestView(APIView):
         if not order:
             return Response({"detail": "Order not found or not permitted"}, status=404)
 
-        if order.status not in {"paid", "delivered"}:
+        if order.status not in _RETURNABLE_STATUSES:
             return Response({"detail": f"Order not returnable in status '{order.status}'"}, status=400)
 
         try:
@@ -521,11 +589,8 @@ class ReturnAttachmentView(APIView):
             return None, None
 
     def _abs_url(self, request, filefield) -> str:
-        try:
-            url = filefield.url
-        except Exception:
-            return ""
-        return request.build_absolute_uri(url)
+        url = _safe_filefield_url(filefield)
+        return request.build_absolute_uri(url) if url else ""
 
     @extend_schema(responses={200: ReturnAttachmentOutSerializer(many=True)})
     def get(self, request, pk: int, return_id: int):
@@ -587,30 +652,32 @@ class OrderTransitionView(APIView):
             order.transition(new_status, actor=str(request.user), note=request.data.get("note", ""))
             # If staff marks the order as PAID, redeem any coupon used
             if prev != Order.Status.PAID and new_status == Order.Status.PAID:
-                code = (order.coupon_code or "").strip().upper()
-                if code:
-                    try:
-                        c = Coupon.objects.get(code=code)
-                        c.redeem(email=order.email, order_id=order.id)
-                    except Coupon.DoesNotExist:
-                        OrderEvent.log(order, "coupon_missing", f"Coupon not found at redeem: {code}")
+                _redeem_order_coupon(order)
         except ValueError as e:
             return Response({"detail": str(e)}, status=400)
         return Response(_serialize_order(order, request), status=200)
 
 
+# Encoded once at import; the secret only changes with a settings reload
+_WEBHOOK_KEY = force_bytes(getattr(settings, "RAZORPAY_WEBHOOK_SECRET", "") or "")
+# Keyed once at import; copy() clones the primed inner/outer state per request
+_WEBHOOK_MAC = hmac.new(_WEBHOOK_KEY, digestmod=hashlib.sha256) if _WEBHOOK_KEY else None
+
+
 def _verify_razorpay_sig(request) -> bool:
     """
     Verify Razorpay webhook signature when a secret is configured.
+    Razorpay sends a hex HMAC-SHA256 of the raw body; compare raw digests.
     """
-    secret = getattr(settings, "RAZORPAY_WEBHOOK_SECRET", "") or ""
-    if not secret:
+    if _WEBHOOK_MAC is None:
         return True  # dev / no secret configured
-    signature = request.headers.get("X-Razorpay-Signature", "")
-    body = request.body or b""
-    digest = hmac.new(force_bytes(secret), body, hashlib.sha256).digest()
-    expected = base64.b64encode(digest).decode()
-    return hmac.compare_digest(signature, expected)
+    try:
+        received = bytes.fromhex(request.headers.get("X-Razorpay-Signature", ""))
+    except ValueError:
+        return False
+    mac = _WEBHOOK_MAC.copy()
+    mac.update(request.body or b"")
+    return hmac.compare_digest(mac.digest(), received)
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -637,9 +704,7 @@ class PaymentWebhookView(APIView):
             return Response({"detail": "invalid signature"}, status=400)
 
         # Idempotency guard
-        try:
-            PaymentIdempotency.objects.create(event_id=event_id)
-        except IntegrityError:
+        if not PaymentIdempotency.claim(event_id):
             return Response({"detail": "duplicate"}, status=200)
 
         try:
@@ -647,31 +712,33 @@ class PaymentWebhookView(APIView):
         except Order.DoesNotExist:
             return Response({"detail": "order not found"}, status=404)
 
+        # Payment metadata rides along with the status UPDATE when there is one
+        meta_fields = ["payment_provider"]
         if pref:
             order.payment_reference = pref
+            meta_fields.append("payment_reference")
         order.payment_provider = provider
+        saved = False
 
         if status_str == "success":
             if order.status == Order.Status.CREATED:
-                order.transition(Order.Status.PAID, actor="webhook", note=f"{provider}:{pref}")
+                order.transition(
+                    Order.Status.PAID, actor="webhook", note=f"{provider}:{pref}", extra_fields=meta_fields
+                )
+                saved = True
                 # Redeem coupon when payment succeeds
-                code = (order.coupon_code or "").strip().upper()
-                if code:
-                    try:
-                        c = Coupon.objects.get(code=code)
-                        c.redeem(email=order.email, order_id=order.id)
-                    except Coupon.DoesNotExist:
-                        OrderEvent.log(order, "coupon_missing", f"Coupon not found at redeem: {code}")
+                _redeem_order_coupon(order)
         elif status_str == "refunded":
-            if order.status in {Order.Status.PAID, Order.Status.DELIVERED, Order.Status.RETURNED}:
-                order.transition(Order.Status.REFUNDED, actor="webhook", note=f"{provider}:{pref}")
+            if order.status in _REFUNDABLE_STATUSES:
+                order.transition(
+                    Order.Status.REFUNDED, actor="webhook", note=f"{provider}:{pref}", extra_fields=meta_fields
+                )
+                saved = True
         elif status_str == "failed":
             OrderEvent.log(order, "payment_failed", f"{provider}:{pref}")
         else:
             OrderEvent.log(order, "payment_unknown", f"{provider}:{pref}:{status_str}")
 
-        if pref:
-            order.save(update_fields=["payment_provider", "payment_reference", "updated_at"])
-        else:
-            order.save(update_fields=["payment_provider", "updated_at"])
+        if not saved:
+            order.save(update_fields=[*meta_fields, "updated_at"])
         return Response(status=200)
@@ -1,12 +1,23 @@
 # payments/admin.py
 from __future__ import annotations
 
+import html
 import json
+
+try:
+    import orjson  # optional: much faster indent-2 dumps
+except Exception:  # pragma: no cover
+    orjson = None
+
 from django.contrib import admin
+from django.forms.models import BaseInlineFormSet
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
+from django.db.models.functions import Substr
 from django.utils.html import format_html
-from django.utils.safestring import mark_safe
+from django.utils.safestring import SafeString, mark_safe
 
-from .models import Payment, PaymentEvent, PaymentConfig
+from core.admin_helpers import is_changelist
+from .models import Payment, PaymentEvent, PaymentConfig, PaymentStatus
 
 
 # ---------- helpers ----------
@@ -14,37 +25,119 @@ from .models import Payment, PaymentEvent, PaymentConfig
 def _paise_to_rupees(paise: int | None) -> str:
     if paise is None:
         return "—"
-    return f"{paise/100:.2f}"
+    rupees, rem = divmod(paise, 100)  # paise columns are non-negative ints
+    return f"{rupees}.{rem:02d}"
 
 
 def _pretty_json(data) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass  # unsupported type; let stdlib json have a go
     try:
         return json.dumps(data, indent=2, ensure_ascii=False)
     except Exception:
         return str(data)
 
 
+_PRE_STYLE = "overflow:auto; padding:8px; background:#f6f8fa; border:1px solid #e1e4e8;"
+# Opening tags for the heights in use (inline preview / full change-form view)
+_PRE_OPEN = {h: mark_safe(f'<pre style="max-height:{h}px; {_PRE_STYLE}">') for h in (180, 320)}
+_PRE_CLOSE = mark_safe("</pre>")
+
+
+def _pre_block(text: str, *, height: int) -> str:
+    """Wrap already-dumped JSON in a scrollable <pre>, escaping it for HTML."""
+    return _PRE_OPEN[height] + SafeString(html.escape(text, quote=False)) + _PRE_CLOSE
+
+
+def _cached_pretty(obj, attr: str) -> str:
+    """Pretty-print obj.<attr> once per instance; admin may render a field repeatedly."""
+    key = f"_pretty_{attr}"
+    text = getattr(obj, key, None)
+    if text is None:
+        text = _pretty_json(getattr(obj, attr))
+        setattr(obj, key, text)
+    return text
+
+
+_BADGE_HTML = (
+    '<span style="display:inline-block;padding:2px 8px;border-radius:12px;'
+    'background:{};color:#fff;font-size:12px;">{}</span>'
+)
+_DEFAULT_BADGE_COLOR = "#6c757d"
+_STATUS_LABELS = dict(PaymentStatus.choices)  # plain {value: label}, no per-row display lookup
+_STATUS_COLORS = {
+    PaymentStatus.CREATED: "#6c757d",
+    PaymentStatus.AUTHORIZED: "#0d6efd",
+    PaymentStatus.CAPTURED: "#198754",
+    PaymentStatus.FAILED: "#dc3545",
+    PaymentStatus.REFUNDED: "#20c997",
+    PaymentStatus.PARTIAL_REFUNDED: "#fd7e14",
+}
+
+
+def _render_badge(color: str, label) -> str:
+    return format_html(_BADGE_HTML, color, label)
+
+
+# Only six statuses exist, so render each badge once at import
+_STATUS_BADGES = {
+    value: _render_badge(_STATUS_COLORS.get(value, _DEFAULT_BADGE_COLOR), label)
+    for value, label in _STATUS_LABELS.items()
+}
+
+
 # ---------- inlines ----------
 
+class RecentEventsFormSet(BaseInlineFormSet):
+    """Show only the newest events; chatty webhooks can attach thousands to one payment."""
+    max_events = 25
+
+    def get_queryset(self):
+        if not hasattr(self, "_queryset"):
+            # slice after the formset has filtered by the parent payment
+            self._queryset = super().get_queryset()[: self.max_events]
+        return self._queryset
+
+
 class PaymentEventInline(admin.TabularInline):
     model = PaymentEvent
+    formset = RecentEventsFormSet
     extra = 0
+    can_delete = False
     fields = ("event_id", "event_type", "created_at", "signature_short", "payload_preview")
     readonly_fields = ("event_id", "event_type", "created_at", "signature_short", "payload_preview")
     ordering = ("-created_at",)
+    verbose_name_plural = f"Payment events (latest {RecentEventsFormSet.max_events})"
+
+    def get_queryset(self, request):
+        # Only the first 10 signature chars are shown; let the DB slice them
+        return (
+            super().get_queryset(request)
+            .annotate(sig10=Substr("signature", 1, 10))
+            .defer("headers", "signature")
+        )
+
+    def has_add_permission(self, request, obj=None) -> bool:
+        return False
+
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
 
+    @admin.display(description="Signature")
     def signature_short(self, obj: PaymentEvent) -> str:
-        if not obj.signature:
+        sig = getattr(obj, "sig10", None)
+        if sig is None:
+            sig = (obj.signature or "")[:10]
+        if not sig:
             return "—"
-        return obj.signature[:10] + "…"
-    signature_short.short_description = "Signature"
+        return sig + "…"
 
+    @admin.display(description="Payload (preview)")
     def payload_preview(self, obj: PaymentEvent) -> str:
-        text = _pretty_json(obj.payload)
-        return mark_safe(
-            f'<pre style="max-height:180px; overflow:auto; padding:8px; background:#f6f8fa; border:1px solid #e1e4e8;">{admin.utils.display_for_value(text)}</pre>'
-        )
-    payload_preview.short_description = "Payload (preview)"
+        return _pre_block(_cached_pretty(obj, "payload"), height=180)
 
 
 # ---------- Payment admin ----------
@@ -99,48 +192,50 @@ class PaymentAdmin(admin.ModelAdmin):
         ("Raw Payload", {"fields": ("raw_payload_pretty",)}),
     )
 
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        if is_changelist(request):
+            # list columns never show the payload; the change form still loads it
+            return qs.defer("raw_payload")
+        # Only the change form shows the refund flag: let the DB compute it there
+        return qs.annotate(
+            is_fully_refunded=ExpressionWrapper(
+                Q(refund_amount_paise__gte=F("amount_paise")), output_field=BooleanField()
+            ),
+        )
+
+    @admin.display(description="Order", ordering="order_id")
     def order_link(self, obj: Payment) -> str:
         if not obj.order_id:
             return "—"
-        url = f"/admin/orders/order/{obj.order_id}/change/"
-        return format_html('<a href="{}">Order #{}</a>', url, obj.order_id)
-    order_link.short_description = "Order"
+        # order_id is an int FK value, so there is nothing to escape
+        return mark_safe(f'<a href="/admin/orders/order/{obj.order_id:d}/change/">Order #{obj.order_id:d}</a>')
 
+    @admin.display(description="Amount (₹)", ordering="amount_paise")
     def amount_rupees(self, obj: Payment) -> str:
         return _paise_to_rupees(obj.amount_paise)
-    amount_rupees.short_description = "Amount (₹)"
 
+    @admin.display(description="Refunded (₹)", ordering="refund_amount_paise")
     def refund_rupees(self, obj: Payment) -> str:
         return _paise_to_rupees(obj.refund_amount_paise)
-    refund_rupees.short_description = "Refunded (₹)"
 
+    @admin.display(description="Fully refunded?", ordering="is_fully_refunded")
     def fully_refunded_flag(self, obj: Payment) -> str:
-        return "Yes" if obj.fully_refunded else "No"
-    fully_refunded_flag.short_description = "Fully refunded?"
+        flag = getattr(obj, "is_fully_refunded", None)
+        if flag is None:
+            flag = obj.fully_refunded
+        return "Yes" if flag else "No"
 
+    @admin.display(description="Status", ordering="status")
     def status_badge(self, obj: Payment) -> str:
-        color = {
-            Payment.Status.CREATED: "#6c757d",
-            Payment.Status.AUTHORIZED: "#0d6efd",
-            Payment.Status.CAPTURED: "#198754",
-            Payment.Status.FAILED: "#dc3545",
-            Payment.Status.REFUNDED: "#20c997",
-            Payment.Status.PARTIAL_REFUNDED: "#fd7e14",
-        }.get(obj.status, "#6c757d")
-        return format_html(
-            '<span style="display:inline-block;padding:2px 8px;border-radius:12px;background:{};color:#fff;font-size:12px;">{}</span>',
-            color,
-            obj.get_status_display(),
-        )
-    status_badge.short_description = "Status"
-    status_badge.admin_order_field = "status"
+        badge = _STATUS_BADGES.get(obj.status)
+        if badge is None:  # status outside PaymentStatus (legacy rows)
+            badge = _render_badge(_DEFAULT_BADGE_COLOR, _STATUS_LABELS.get(obj.status, obj.status))
+        return badge
 
+    @admin.display(description="Raw payload")
     def raw_payload_pretty(self, obj: Payment) -> str:
-        text = _pretty_json(obj.raw_payload)
-        return mark_safe(
-            f'<pre style="max-height:320px; overflow:auto; padding:8px; background:#f6f8fa; border:1px solid #e1e4e8;">{admin.utils.display_for_value(text)}</pre>'
-        )
-    raw_payload_pretty.short_description = "Raw payload"
+        return _pre_block(_cached_pretty(obj, "raw_payload"), height=320)
 
     def has_add_permission(self, request) -> bool:
         return False
@@ -162,23 +257,28 @@ class PaymentEventAdmin(admin.ModelAdmin):
     )
     ordering = ("-id",)
     date_hierarchy = "created_at"
+    # payment_link renders from payment_id alone, so rows need no join; selecting
+    # payment/payment__order here would only drag Payment.raw_payload into every row.
+    list_select_related = False
     readonly_fields = ("event_id", "event_type", "payment", "signature", "payload_pretty", "created_at")
 
     fields = ("event_id", "event_type", "payment", "signature", "payload_pretty", "created_at")
 
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        if is_changelist(request):
+            qs = qs.defer("payload", "headers")
+        return qs
+
+    @admin.display(description="Payment", ordering="payment_id")
     def payment_link(self, obj: PaymentEvent) -> str:
         if not obj.payment_id:
             return "—"
-        url = f"/admin/payments/payment/{obj.payment_id}/change/"
-        return format_html('<a href="{}">Payment #{}</a>', url, obj.payment_id)
-    payment_link.short_description = "Payment"
+        return mark_safe(f'<a href="/admin/payments/payment/{obj.payment_id:d}/change/">Payment #{obj.payment_id:d}</a>')
 
+    @admin.display(description="Payload")
     def payload_pretty(self, obj: PaymentEvent) -> str:
-        text = _pretty_json(obj.payload)
-        return mark_safe(
-            f'<pre style="max-height:320px; overflow:auto; padding:8px; background:#f6f8fa; border:1px solid #e1e4e8;">{admin.utils.display_for_value(text)}</pre>'
-        )
-    payload_pretty.short_description = "Payload"
+        return _pre_block(_cached_pretty(obj, "payload"), height=320)
 
 
 # ---------- PaymentConfig admin ----------
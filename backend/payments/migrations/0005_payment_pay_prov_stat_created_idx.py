@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0004_alter_payment_updated_at'),
+    ]
+
+    operations = [
+        # build the composite before dropping the (provider, status) index it supersedes
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['provider', 'status', '-created_at'], name='pay_prov_stat_created_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payments_pa_provide_cc7861_idx',
+        ),
+    ]
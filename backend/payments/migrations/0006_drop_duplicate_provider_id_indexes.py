@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_payment_pay_prov_stat_created_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payments_pa_provide_c37514_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='payments_pa_provide_adf74c_idx',
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:40
+
+import core.jsoncodec
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0006_drop_duplicate_provider_id_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='raw_payload',
+            field=models.JSONField(blank=True, decoder=core.jsoncodec.OrjsonDecoder, default=dict, encoder=core.jsoncodec.OrjsonEncoder),
+        ),
+        migrations.AlterField(
+            model_name='paymentevent',
+            name='headers',
+            field=models.JSONField(blank=True, decoder=core.jsoncodec.OrjsonDecoder, default=dict, encoder=core.jsoncodec.OrjsonEncoder),
+        ),
+        migrations.AlterField(
+            model_name='paymentevent',
+            name='payload',
+            field=models.JSONField(blank=True, decoder=core.jsoncodec.OrjsonDecoder, default=dict, encoder=core.jsoncodec.OrjsonEncoder),
+        ),
+    ]
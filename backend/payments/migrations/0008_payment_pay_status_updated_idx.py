@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_created_status_idx'),
+        ('payments', '0007_orjson_payload_codec'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'updated_at'], name='pay_status_updated_idx'),
+        ),
+    ]
@@ -1,9 +1,12 @@
 # payments/models.py
 from __future__ import annotations
 
+from decimal import Decimal
+
 from django.db import models
 from django.utils import timezone
 
+from core.jsoncodec import OrjsonDecoder, OrjsonEncoder
 from orders.models import Order
 
 
@@ -99,16 +102,19 @@ class Payment(models.Model):
     refund_amount_paise = models.PositiveIntegerField(default=0)
 
     # For debugging/auditing
-    raw_payload = models.JSONField(default=dict, blank=True)
+    raw_payload = models.JSONField(default=dict, blank=True, encoder=OrjsonEncoder, decoder=OrjsonDecoder)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)  # useful as status changes
 
     class Meta:
         indexes = [
-            models.Index(fields=["provider", "status"]),
+            # admin changelist: filter by provider/status, newest first; its
+            # (provider, status) prefix also serves plain provider/status filters
+            models.Index(fields=["provider", "status", "-created_at"], name="pay_prov_stat_created_idx"),
             models.Index(fields=["order", "provider"]),
-            models.Index(fields=["provider_order_id"]),
-            models.Index(fields=["provider_payment_id"]),
+            # reports: refunded/partially refunded payments by updated_at window
+            models.Index(fields=["status", "updated_at"], name="pay_status_updated_idx"),
+            # provider_order_id / provider_payment_id are covered by their db_index=True
         ]
         constraints = [
             # A given provider_order_id must be unique per provider
@@ -130,12 +136,12 @@ class Payment(models.Model):
 
     # ---- Helpers ----
     @property
-    def amount_rupees(self) -> float:
-        return round(self.amount_paise / 100.0, 2)
+    def amount_rupees(self) -> Decimal:
+        return Decimal(self.amount_paise).scaleb(-2)  # exact, no float round-trip
 
     @property
-    def refund_amount_rupees(self) -> float:
-        return round(self.refund_amount_paise / 100.0, 2)
+    def refund_amount_rupees(self) -> Decimal:
+        return Decimal(self.refund_amount_paise).scaleb(-2)
 
     @property
     def fully_refunded(self) -> bool:
@@ -159,8 +165,9 @@ class PaymentEvent(models.Model):
     event_id = models.CharField(max_length=128, db_index=True)   # e.g., Razorpay event.id
     event_type = models.CharField(max_length=60, db_index=True)
     signature = models.CharField(max_length=256, blank=True)
-    payload = models.JSONField(default=dict, blank=True)
-    headers = models.JSONField(default=dict, blank=True)         # optional: store request headers
+    payload = models.JSONField(default=dict, blank=True, encoder=OrjsonEncoder, decoder=OrjsonDecoder)
+    # optional: store request headers
+    headers = models.JSONField(default=dict, blank=True, encoder=OrjsonEncoder, decoder=OrjsonDecoder)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
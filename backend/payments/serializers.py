@@ -1,11 +1,17 @@
 # payments/serializers.py
 from __future__ import annotations
 
+import operator
+from decimal import Decimal
+
 from rest_framework import serializers
 
 from .models import PaymentProvider
 
 
+_request_is_authenticated = operator.attrgetter("user.is_authenticated")
+
+
 class CreateIntentSerializer(serializers.Serializer):
     """
     Input for creating a payment intent/order at the gateway.
@@ -21,8 +27,10 @@ class CreateIntentSerializer(serializers.Serializer):
     capture = serializers.BooleanField(required=False, default=True)
 
     def validate(self, attrs):
-        request = self.context.get("request")
-        is_auth = bool(getattr(getattr(request, "user", None), "is_authenticated", False))
+        try:
+            is_auth = bool(_request_is_authenticated(self.context.get("request")))
+        except AttributeError:  # no request / anonymous stub without a user
+            is_auth = False
         if not is_auth and not attrs.get("email"):
             raise serializers.ValidationError({"email": "Required for guest checkout."})
         return attrs
@@ -49,11 +57,12 @@ class RefundSerializer(serializers.Serializer):
     - You may optionally pass `provider_payment_id` to target a specific charge.
     """
     order_id = serializers.IntegerField()
-    amount = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    amount = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        required=False,
+        min_value=Decimal("0.01"),
+        error_messages={"min_value": "Amount must be greater than 0."},
+    )
     provider_payment_id = serializers.CharField(required=False, allow_blank=True)
     reason = serializers.CharField(required=False, allow_blank=True, max_length=200)
-
-    def validate_amount(self, value):
-        if value is not None and value <= 0:
-            raise serializers.ValidationError("Amount must be greater than 0.")
-        return value
@@ -3,9 +3,11 @@ from __future__ import annotations
 
 import json
 import hmac
-import hashlib
+import secrets
 import time
+import uuid
 from decimal import Decimal
+from functools import lru_cache
 from typing import Optional
 
 try:
@@ -13,8 +15,14 @@ try:
 except Exception:  # pragma: no cover
     razorpay = None  # allow running without the package in mock mode
 
+try:
+    import orjson  # optional: faster webhook parsing, reads bytes directly
+except Exception:  # pragma: no cover
+    orjson = None
+
 from django.conf import settings
-from django.db import transaction
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Value, When
 from django.utils import timezone
 from rest_framework import permissions
 from rest_framework.response import Response
@@ -26,11 +34,17 @@ from drf_spectacular.utils import extend_schema
 from .models import Payment, PaymentEvent, PaymentProvider
 from .serializers import CreateIntentSerializer, RefundSerializer
 from orders.models import Order
+from reports.models import invalidate_order_day
 
 
 # ----------------- helpers -----------------
 
 def _rupees_to_paise(amount_rupees: Decimal | float | str | int) -> int:
+    # order.total / serializer amounts are already Decimal: skip the str() round-trip
+    if isinstance(amount_rupees, int):
+        return amount_rupees * 100
+    if isinstance(amount_rupees, Decimal):
+        return int(amount_rupees * 100)
     return int(Decimal(str(amount_rupees)) * 100)
 
 
@@ -44,10 +58,44 @@ def _use_mock_mode() -> bool:
     return not (key_id and key_secret)
 
 
+def _loads(body: bytes):
+    if orjson is not None:
+        return orjson.loads(body)  # no separate .decode() pass
+    return json.loads(body.decode("utf-8"))
+
+
+@lru_cache(maxsize=4)
+def _hmac_key(secret: str) -> bytes:
+    # keyed on the settings value, so a changed secret is simply a new entry
+    return secret.encode()
+
+
+@lru_cache(maxsize=2)
+def _razorpay_client(key_id: str, key_secret: str):
+    # One client (and its requests.Session pool) per credential pair, so intent
+    # and refund calls reuse the keep-alive TLS connection to api.razorpay.com.
+    return razorpay.Client(auth=(key_id, key_secret))
+
+
 def _currency() -> str:
     return getattr(settings, "PAYMENT_CURRENCY", "INR") or "INR"
 
 
+def _create_or_get(model, lookup: dict, defaults: dict):
+    """
+    Insert-first get_or_create: a single INSERT in the common (new) case; on a
+    unique conflict, fall back to fetching (and locking) the existing row.
+    """
+    try:
+        with transaction.atomic():  # savepoint so the outer transaction survives a conflict
+            return model.objects.create(**lookup, **defaults), True
+    except IntegrityError:
+        obj = model.objects.select_for_update().filter(**lookup).first()
+        if obj is None:
+            raise  # not a duplicate; some other constraint failed
+        return obj, False
+
+
 def _find_order_for_request(request, order_id: int) -> Optional[Order]:
     """
     Authorize access to the order:
@@ -56,28 +104,114 @@ def _find_order_for_request(request, order_id: int) -> Optional[Order]:
     - Else (guest): require ?email=<email> matching order.email.
     Returns the order or None.
     """
-    email_param = (request.query_params.get("email") or request.GET.get("email") or "").strip()
+    email_param = (request.query_params.get("email") or "").strip().lower()
     try:
         order = Order.objects.get(pk=order_id)
     except Order.DoesNotExist:
         return None
 
+    order_email = (getattr(order, "email", "") or "").lower()
     user = getattr(request, "user", None)
-    if user and getattr(user, "is_authenticated", False):
-        if getattr(order, "user_id", None) == getattr(user, "id", None):
-            return order
-        if getattr(order, "email", "") and getattr(user, "email", "") and order.email.lower() == user.email.lower():
-            return order
-        if email_param and getattr(order, "email", "").lower() == email_param.lower():
-            return order
-        return None
-
-    # guest path
-    if email_param and getattr(order, "email", "").lower() == email_param.lower():
+    authed = bool(user and getattr(user, "is_authenticated", False))
+    user_email = (getattr(user, "email", "") or "").lower() if authed else ""
+    owner_id = getattr(order, "user_id", None)
+
+    if (
+        (email_param and order_email == email_param)
+        or (authed and owner_id is not None and owner_id == getattr(user, "id", None))
+        or (user_email and order_email == user_email)
+    ):
         return order
     return None
 
 
+def _mark_order(order_id: int, status: str, **fields) -> int:
+    """Move the order to status with one conditional UPDATE (no read, no lock, race-free)."""
+    n = Order.objects.filter(pk=order_id).exclude(status=status).update(status=status, **fields)
+    if n:
+        # .update() sends no post_save: drop the order's materialized report day here
+        invalidate_order_day(Order.objects.values_list("created_at", flat=True).get(pk=order_id))
+    return n
+
+
+def _apply_refund(payment: Payment, amount_paise: int, refund_id: str, *,
+                  expected_refunded: int | None = None) -> bool:
+    """
+    Add a refund to the payment in one UPDATE (status derived in SQL), then sync
+    the instance. With expected_refunded the UPDATE is optimistic: it only lands
+    if no other refund was recorded since the caller read the row.
+    """
+    qs = Payment.objects.filter(pk=payment.pk)
+    if expected_refunded is not None:
+        qs = qs.filter(refund_amount_paise=expected_refunded)
+    new_total = F("refund_amount_paise") + amount_paise
+    rows = qs.update(
+        refund_amount_paise=new_total,
+        refund_id=refund_id,
+        status=Case(
+            When(amount_paise__lte=new_total, then=Value(Payment.Status.REFUNDED)),
+            default=Value(Payment.Status.PARTIAL_REFUNDED),
+        ),
+    )
+    if not rows:
+        return False
+    payment.refresh_from_db(fields=["refund_amount_paise", "refund_id", "status"])
+    return True
+
+
+def _log_event_after_commit(**fields) -> None:
+    """
+    Write an audit-only PaymentEvent once the surrounding transaction commits,
+    so its JSON payload isn't written while payment/order rows are locked.
+    robust=True: a failed audit insert is logged, never turned into a 500 after
+    the money movement has already committed.
+    """
+    transaction.on_commit(lambda: PaymentEvent.objects.create(**fields), robust=True)
+
+
+def _persist_intent(order: Order, provider: str, amount_paise: int, currency: str,
+                    rp_order: dict, *, event_type: str) -> Optional[Payment]:
+    """
+    Record the provider order as a Payment plus its intent event (both idempotent).
+    Returns None when the provider order id is already bound to another order.
+    """
+    with transaction.atomic():
+        payment, created = _create_or_get(
+            Payment,
+            {"provider": provider, "provider_order_id": rp_order["id"]},
+            {
+                "order": order,
+                "status": Payment.Status.CREATED,
+                "amount_paise": amount_paise,
+                "currency": currency,
+                "raw_payload": rp_order,
+            },
+        )
+        if not created:
+            if payment.order_id != order.id:
+                return None
+            # Duplicate submit: only a true re-issue (amount/currency changed) is written
+            if payment.amount_paise != amount_paise or payment.currency != currency:
+                payment.amount_paise = amount_paise
+                payment.currency = currency
+                payment.raw_payload = rp_order
+                payment.save(update_fields=["amount_paise", "currency", "raw_payload"])
+            # The intent event was written in the same transaction as the Payment, so it
+            # already exists; skip the doomed INSERT + savepoint rollback + re-select.
+            return payment
+
+        _create_or_get(
+            PaymentEvent,
+            {"provider": provider, "event_id": rp_order["id"]},
+            {
+                "payment": payment,
+                "event_type": event_type,
+                "payload": rp_order,
+            },
+        )
+    return payment
+
+
 # ----------------- views -----------------
 
 class CreateIntentView(GenericAPIView):
@@ -120,115 +254,49 @@ class CreateIntentView(GenericAPIView):
         amount_paise = _rupees_to_paise(order.total)
         currency = _currency()
 
-        # ----- MOCK MODE -----
-        if _use_mock_mode():
-            mock_provider_order_id = f"order_MOCK_{order.id}_{int(time.time())}"
+        mock = _use_mock_mode()
+        if mock:
+            # ----- MOCK MODE -----
+            # per-second id on purpose: a double-submitted intent maps to the same Payment
             rp_order = {
-                "id": mock_provider_order_id,
+                "id": f"order_MOCK_{order.id}_{int(time.time())}",
                 "amount": amount_paise,
                 "currency": currency,
                 "status": "created",
                 "notes": {"mock": True, "order_id": order.id},
             }
-            with transaction.atomic():
-                payment, created = Payment.objects.get_or_create(
-                    provider_order_id=mock_provider_order_id,
-                    defaults={
-                        "order": order,
-                        "provider": provider,
-                        "status": Payment.Status.CREATED,
-                        "amount_paise": amount_paise,
-                        "currency": currency,
-                        "raw_payload": rp_order,
-                    },
-                )
-                if not created:
-                    if payment.order_id != order.id:
-                        return Response({"detail": "payment already bound to another order"}, status=409)
-                    if payment.amount_paise != amount_paise:
-                        payment.amount_paise = amount_paise
-                        payment.raw_payload = rp_order
-                        payment.save(update_fields=["amount_paise", "raw_payload"])
-
-                PaymentEvent.objects.get_or_create(
-                    provider=provider,
-                    event_id=rp_order["id"],
-                    defaults={
-                        "payment": payment,
-                        "event_type": "intent.create.mock",
-                        "payload": rp_order,
-                    },
-                )
-
-            return Response(
+        else:
+            # ----- REAL RAZORPAY -----
+            if not razorpay:
+                return Response({"detail": "Razorpay SDK not installed and mock mode is off"}, status=500)
+            client = _razorpay_client(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
+            rp_order = client.order.create(
                 {
-                    "provider": provider,
-                    "key": "rzp_test_mock",
-                    "currency": currency,
                     "amount": amount_paise,
-                    "razorpay_order_id": rp_order["id"],
-                    "meta": {"mock": True, "capture": bool(capture)},
-                },
-                status=200,
-            )
-
-        # ----- REAL RAZORPAY -----
-        if not razorpay:
-            return Response({"detail": "Razorpay SDK not installed and mock mode is off"}, status=500)
-
-        client = razorpay.Client(
-            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-        )
-        rp_order = client.order.create(
-            {
-                "amount": amount_paise,
-                "currency": currency,
-                "payment_capture": 1 if capture else 0,
-                "notes": {"order_id": order.id},
-            }
-        )
-
-        with transaction.atomic():
-            payment, created = Payment.objects.get_or_create(
-                provider_order_id=rp_order["id"],
-                defaults={
-                    "order": order,
-                    "provider": provider,
-                    "status": Payment.Status.CREATED,
-                    "amount_paise": amount_paise,
                     "currency": currency,
-                    "raw_payload": rp_order,
-                },
-            )
-            if not created:
-                if payment.order_id != order.id:
-                    return Response({"detail": "payment already bound to another order"}, status=409)
-                if payment.amount_paise != amount_paise or payment.currency != currency:
-                    payment.amount_paise = amount_paise
-                    payment.currency = currency
-                    payment.raw_payload = rp_order
-                    payment.save(update_fields=["amount_paise", "currency", "raw_payload"])
-
-            PaymentEvent.objects.get_or_create(
-                provider=provider,
-                event_id=rp_order.get("id", f"intent:{rp_order['id']}"),
-                defaults={
-                    "payment": payment,
-                    "event_type": "intent.create",
-                    "payload": rp_order,
-                },
+                    "payment_capture": 1 if capture else 0,
+                    "notes": {"order_id": order.id},
+                }
             )
 
-        return Response(
-            {
-                "provider": provider,
-                "key": settings.RAZORPAY_KEY_ID,
-                "currency": currency,
-                "amount": amount_paise,
-                "razorpay_order_id": rp_order["id"],
-            },
-            status=200,
+        payment = _persist_intent(
+            order, provider, amount_paise, currency, rp_order,
+            event_type="intent.create.mock" if mock else "intent.create",
         )
+        if payment is None:
+            return Response({"detail": "payment already bound to another order"}, status=409)
+
+        data = {
+            "provider": provider,
+            # must be the key of the account that created rp_order above
+            "key": "rzp_test_mock" if mock else settings.RAZORPAY_KEY_ID,
+            "currency": currency,
+            "amount": amount_paise,
+            "razorpay_order_id": rp_order["id"],
+        }
+        if mock:
+            data["meta"] = {"mock": True, "capture": bool(capture)}
+        return Response(data, status=200)
 
 
 class RazorpayWebhookView(APIView):
@@ -246,17 +314,14 @@ class RazorpayWebhookView(APIView):
         if not secret:
             return False
 
-        if razorpay:
-            try:
-                razorpay.Utility.verify_webhook_signature(
-                    body.decode("utf-8"), signature, secret
-                )
-                return True
-            except Exception:
-                pass
-
-        digest = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
-        return hmac.compare_digest(digest, signature or "")
+        # Same HMAC-SHA256 razorpay.Utility computes, without its str round-trip
+        try:
+            received = bytes.fromhex(signature or "")
+        except ValueError:
+            return False
+        # one-shot OpenSSL HMAC; compare raw digests instead of hex strings
+        digest = hmac.digest(_hmac_key(secret), body, "sha256")
+        return hmac.compare_digest(digest, received)
 
     @extend_schema(exclude=True)  # keep webhook out of public docs
     @transaction.atomic
@@ -269,18 +334,18 @@ class RazorpayWebhookView(APIView):
             return Response({"detail": "invalid signature"}, status=400)
 
         try:
-            event = json.loads(body.decode("utf-8"))
+            event = _loads(body)
         except Exception:
             return Response({"detail": "invalid payload"}, status=400)
 
-        event_id = event.get("id") or f"evt:{int(time.time())}"
+        event_id = event.get("id") or f"evt:{uuid.uuid4().hex}"  # id-less events must not collide
         etype = event.get("event", "")
 
         # Idempotency: use (provider, event_id)
-        ev, created = PaymentEvent.objects.get_or_create(
-            provider=PaymentProvider.RAZORPAY,
-            event_id=event_id,
-            defaults={
+        ev, created = _create_or_get(
+            PaymentEvent,
+            {"provider": PaymentProvider.RAZORPAY, "event_id": event_id},
+            {
                 "event_type": f"webhook.{etype or 'unknown'}",
                 "payload": event,
                 "signature": signature,
@@ -297,12 +362,18 @@ class RazorpayWebhookView(APIView):
                 return Response({"detail": "missing payment entity"}, status=400)
 
             rp_order_id = ent.get("order_id")
-            payment_id = ent.get("id") or f"pay_mock_{int(time.time())}"
+            payment_id = ent.get("id") or f"pay_mock_{secrets.token_hex(6)}"
             amount = int(ent.get("amount", 0))
             currency = ent.get("currency", _currency())
 
             try:
-                payment = Payment.objects.select_for_update().get(provider_order_id=rp_order_id)
+                # raw_payload is overwritten below, so don't fetch the stored copy.
+                # The order is updated by id, so it needn't be joined or locked.
+                payment = (
+                    Payment.objects.defer("raw_payload")
+                    .select_for_update(of=("self",))
+                    .get(provider=PaymentProvider.RAZORPAY, provider_order_id=rp_order_id)
+                )
             except Payment.DoesNotExist:
                 ev.payment = None
                 ev.save(update_fields=["payment"])
@@ -324,13 +395,9 @@ class RazorpayWebhookView(APIView):
             payment.raw_payload = ent
             payment.save(update_fields=["status", "provider_payment_id", "amount_paise", "currency", "raw_payload"])
 
-            order = payment.order
-            if order.status != Order.Status.PAID:
-                order.status = Order.Status.PAID
-                order.payment_confirmed_at = timezone.now()
-                order.save(update_fields=["status", "payment_confirmed_at"])
+            _mark_order(payment.order_id, Order.Status.PAID, payment_confirmed_at=timezone.now())
 
-            PaymentEvent.objects.create(
+            _log_event_after_commit(
                 payment=payment,
                 provider=payment.provider,
                 event_id=f"{event_id}:captured",
@@ -350,8 +417,7 @@ class RefundView(APIView):
     permission_classes = [IsAdminUser]
     serializer_class = RefundSerializer  # for schema
 
-    @extend_schema(request=RefundSerializer, responses={200: None, 400: None, 404: None})
-    @transaction.atomic
+    @extend_schema(request=RefundSerializer, responses={200: None, 400: None, 404: None, 409: None})
     def post(self, request):
         ser = RefundSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
@@ -360,17 +426,21 @@ class RefundView(APIView):
         amount_rupees = ser.validated_data.get("amount")  # optional (full refund if None)
         target_pay_id = ser.validated_data.get("provider_payment_id") or ""
 
+        # Plain read: no row lock is held across the provider HTTP call below;
+        # concurrent refunds are caught by _apply_refund instead.
+        qs = (
+            Payment.objects.defer("raw_payload")  # refunds never read the stored provider payload
+            .filter(order_id=order_id, status=Payment.Status.CAPTURED)
+        )
+        if target_pay_id:
+            qs = qs.filter(provider_payment_id=target_pay_id)
         try:
-            order = Order.objects.select_for_update().get(pk=order_id)
-            qs = order.payments.select_for_update().filter(status=Payment.Status.CAPTURED)
-            if target_pay_id:
-                payment = qs.get(provider_payment_id=target_pay_id)
-            else:
-                payment = qs.latest("id")
-        except (Order.DoesNotExist, Payment.DoesNotExist):
+            payment = qs.latest("id")
+        except Payment.DoesNotExist:
             return Response({"detail": "captured payment not found"}, status=404)
 
-        remaining = payment.amount_paise - payment.refund_amount_paise
+        already_refunded = payment.refund_amount_paise
+        remaining = payment.amount_paise - already_refunded
         if remaining <= 0:
             return Response({"detail": "nothing left to refund"}, status=400)
 
@@ -378,58 +448,44 @@ class RefundView(APIView):
         if amount_paise <= 0 or amount_paise > remaining:
             return Response({"detail": "invalid refund amount"}, status=400)
 
-        # MOCK
-        if _use_mock_mode():
+        mock = _use_mock_mode()
+        if mock:
             resp = {
-                "id": f"rfnd_mock_{int(time.time())}",
+                "id": f"rfnd_mock_{secrets.token_hex(6)}",
                 "amount": amount_paise,
                 "currency": payment.currency,
                 "payment_id": payment.provider_payment_id or "pay_mock",
                 "notes": {"mock": True},
                 "status": "processed",
             }
+            refunded, refund_id = amount_paise, resp["id"]
+        else:
+            if not razorpay:
+                return Response({"detail": "Razorpay SDK not installed and mock mode is off"}, status=500)
+            client = _razorpay_client(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
+            resp = client.payment.refund(payment.provider_payment_id, {"amount": amount_paise})
+            refunded = int(resp.get("amount", 0))
+            refund_id = resp.get("id", "") or payment.refund_id
 
-            payment.refund_amount_paise += amount_paise
-            payment.refund_id = resp["id"]
-            payment.status = Payment.Status.REFUNDED if payment.fully_refunded else Payment.Status.PARTIAL_REFUNDED
-            payment.save(update_fields=["refund_amount_paise", "refund_id", "status"])
+        with transaction.atomic():
+            # A mock refund only lands if nothing raced it. A real one has already moved
+            # money (and Razorpay caps it at the captured amount), so always record it.
+            expected = already_refunded if mock else None
+            if not _apply_refund(payment, refunded, refund_id, expected_refunded=expected):
+                return Response({"detail": "payment was refunded concurrently; retry"}, status=409)
 
-            if payment.status == Payment.Status.REFUNDED and order.status != Order.Status.REFUNDED:
-                order.status = Order.Status.REFUNDED
-                order.save(update_fields=["status"])
+            if payment.status == Payment.Status.REFUNDED:
+                _mark_order(payment.order_id, Order.Status.REFUNDED)
 
-            PaymentEvent.objects.create(
+            _log_event_after_commit(
                 payment=payment,
                 provider=payment.provider,
-                event_id=resp["id"],
-                event_type="refund.mock",
+                event_id=resp.get("id", f"refund:{payment.id}:{payment.refund_amount_paise}"),
+                event_type="refund.mock" if mock else "refund",
                 payload=resp,
             )
-            return Response({"ok": True, "refund_id": payment.refund_id, "mock": True}, status=200)
-
-        # REAL
-        if not razorpay:
-            return Response({"detail": "Razorpay SDK not installed and mock mode is off"}, status=500)
 
-        client = razorpay.Client(
-            auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
-        )
-        resp = client.payment.refund(payment.provider_payment_id, {"amount": amount_paise})
-
-        payment.refund_amount_paise += int(resp.get("amount", 0))
-        payment.refund_id = resp.get("id", "") or payment.refund_id
-        payment.status = Payment.Status.REFUNDED if payment.fully_refunded else Payment.Status.PARTIAL_REFUNDED
-        payment.save(update_fields=["refund_amount_paise", "refund_id", "status"])
-
-        if payment.status == Payment.Status.REFUNDED and order.status != Order.Status.REFUNDED:
-            order.status = Order.Status.REFUNDED
-            order.save(update_fields=["status"])
-
-        PaymentEvent.objects.create(
-            payment=payment,
-            provider=payment.provider,
-            event_id=resp.get("id", f"refund:{payment.id}:{payment.refund_amount_paise}"),
-            event_type="refund",
-            payload=resp,
-        )
-        return Response({"ok": True, "refund_id": payment.refund_id}, status=200)
+        out = {"ok": True, "refund_id": payment.refund_id}
+        if mock:
+            out["mock"] = True
+        return Response(out, status=200)
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('promotions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='coupon',
+            name='promotions__is_acti_2ec57c_idx',
+        ),
+        migrations.AddIndex(
+            model_name='coupon',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['ends_at', 'starts_at'], name='coupon_active_ix'),
+        ),
+    ]
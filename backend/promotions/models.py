@@ -1,5 +1,8 @@
 from decimal import Decimal
+from django.core.cache import cache
 from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.db.models import F, Q
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -45,17 +48,26 @@ class Coupon(models.Model):
 
     class Meta:
         indexes = [
-            models.Index(fields=["is_active", "starts_at", "ends_at"]),
+            # active() always filters is_active=True; leave disabled codes out of the index
+            models.Index(
+                fields=["ends_at", "starts_at"],
+                name="coupon_active_ix",
+                condition=Q(is_active=True),
+            ),
         ]
 
     def __str__(self):
         return self.code
 
     # -------- Normalization & Validation --------
+    @staticmethod
+    def normalize_code(code) -> str:
+        """Canonical stored form (trimmed, upper). Look codes up with code=<this>, not iexact."""
+        return (code or "").strip().upper()
+
     def clean(self):
         # Normalize code early (upper + trim)
-        if self.code:
-            self.code = self.code.strip().upper()
+        self.code = self.normalize_code(self.code)
 
         if self.ends_at and self.starts_at and self.ends_at < self.starts_at:
             raise ValidationError({"ends_at": "End date must be after start date."})
@@ -74,9 +86,8 @@ class Coupon(models.Model):
             raise ValidationError({"used_count": "Used count exceeds max uses."})
 
     def save(self, *args, **kwargs):
-        # ensure normalized code even if .clean() wasn't called externally
-        if self.code:
-            self.code = self.code.strip().upper()
+        # ensure normalized code even if .clean() wasn't called externally (admin included)
+        self.code = self.normalize_code(self.code)
         super().save(*args, **kwargs)
 
     # -------- Business helpers --------
@@ -107,23 +118,70 @@ class Coupon(models.Model):
     def redeem(self, email: str, order_id: int | None = None) -> bool:
         """
         Atomically record a redemption (+1 used_count) if allowed.
-        Returns True if recorded, False if exhausted.
+        Returns True if recorded, False if exhausted (or, when self.code is set,
+        if the row no longer carries that code).
         """
-        # Reload current row with lock to avoid race
-        c = Coupon.objects.select_for_update().get(pk=self.pk)
-        if c.max_uses is not None and c.used_count >= c.max_uses:
+        # Conditional UPDATE is race-free on its own: no row lock, no re-read
+        if not _increment_used_count(self.pk, self.code or None):
             return False
-        c.used_count = F("used_count") + 1
-        c.save(update_fields=["used_count"])
-        # refresh to get real integer value
-        c.refresh_from_db(fields=["used_count"])
-
-        CouponRedemption.objects.create(coupon=c, email=email, order_id=order_id)
-        # mirror state onto self
-        self.used_count = c.used_count
+
+        CouponRedemption.objects.create(coupon_id=self.pk, email=email, order_id=order_id)
+        # mirror our own +1 onto self (concurrent redeems may have added more)
+        self.used_count += 1
         return True
 
 
+def _increment_used_count(pk: int, code: str | None = None) -> bool:
+    """
+    +1 used_count unless the coupon is capped and exhausted (or, if code is
+    given, no longer has that code). Returns whether a row was updated.
+    """
+    qs = Coupon.objects.filter(pk=pk)
+    if code:
+        qs = qs.filter(code=code)
+    rows = (
+        qs
+        .filter(Q(max_uses__isnull=True) | Q(used_count__lt=F("max_uses")))
+        .update(used_count=F("used_count") + 1)
+    )
+    return rows > 0
+
+
+_COUPON_ID_CACHE_TTL = 300
+
+
+def _coupon_id_cache_key(code: str) -> str:
+    return f"promotions:coupon-id:{code}"
+
+
+def coupon_id_for_code(code: str) -> int:
+    """
+    Shared-cache lookup of normalized code -> Coupon id for hot redeem paths.
+    Misses raise Coupon.DoesNotExist and are not cached, so codes created
+    later are still found. Hits expire after _COUPON_ID_CACHE_TTL seconds.
+    """
+    key = _coupon_id_cache_key(code)
+    pk = cache.get(key)
+    if pk is None:
+        pk = Coupon.objects.values_list("pk", flat=True).get(code=code)
+        cache.set(key, pk, _COUPON_ID_CACHE_TTL)
+    return pk
+
+
+def forget_coupon_id(code: str) -> None:
+    cache.delete(_coupon_id_cache_key(code))
+
+
+@receiver([post_save, post_delete], sender=Coupon)
+def _clear_coupon_id_cache(sender, instance, update_fields=None, **kwargs):
+    # used_count-only saves can't change the code -> id mapping
+    if update_fields and "code" not in update_fields:
+        return
+    # A rename leaves the old code's entry behind until it expires; redeem()
+    # filters on code, so that stale id matches nothing and gets re-resolved
+    forget_coupon_id(instance.code)
+
+
 class CouponRedemption(models.Model):
     coupon = models.ForeignKey(Coupon, on_delete=models.CASCADE, related_name="redemptions")
     email = models.EmailField()
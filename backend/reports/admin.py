@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import DailyReport
+
+
+@admin.register(DailyReport)
+class DailyReportAdmin(admin.ModelAdmin):
+    list_display = ("day", "orders_created", "orders_paid", "gmv", "refreshed_at")
+    date_hierarchy = "day"
+    ordering = ("-day",)
+    readonly_fields = ("refreshed_at",)
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from reports.metrics import summarize
+from reports.models import DailyReport
+
+
+class Command(BaseCommand):
+    help = (
+        "Materialize DailyReport rows for the last N closed days (default 7). "
+        "Run nightly from cron. Order changes drop their day's row (the summary then "
+        "aggregates it live); re-covering recent days rebuilds those rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7, help="How many closed days to (re)compute.")
+
+    def handle(self, *args, **options):
+        days = max(1, options["days"])
+        yesterday = timezone.localdate() - timedelta(days=1)
+
+        for offset in range(days):
+            day = yesterday - timedelta(days=offset)
+            m = summarize([(day, day)])
+            DailyReport.objects.update_or_create(
+                day=day,
+                defaults={
+                    "orders_created": m["orders_created"],
+                    "orders_paid": m["orders_paid"],
+                    "gmv": m["gmv"],
+                },
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed {days} daily report(s) ending {yesterday.isoformat()}."
+        ))
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, Tuple
+
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from orders.models import Order
+from payments.models import Payment
+
+DayRange = Tuple[date, date]
+
+
+# treat these as monetized for GMV/top-products (a tuple keeps the IN params stable)
+PAID_LIKE_STATUSES = (
+    Order.Status.PAID,
+    Order.Status.PICKING,
+    Order.Status.SHIPPED,
+    Order.Status.DELIVERED,
+    Order.Status.RETURNED,
+    Order.Status.REFUNDED,
+)
+
+
+def day_bounds(start: date, end: date) -> Tuple[datetime, datetime]:
+    """Whole days [start, end] in the project TZ as aware datetimes."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, datetime.min.time()), tz),
+        timezone.make_aware(datetime.combine(end, datetime.max.time()), tz),
+    )
+
+
+def missing_ranges(start: date, end: date, have: Iterable[date]) -> list[DayRange]:
+    """Contiguous [a, b] runs of days within [start, end] that are not in `have`."""
+    have = set(have)
+    one = timedelta(days=1)
+    runs: list[DayRange] = []
+    day = start
+    while day <= end:
+        if day not in have:
+            if runs and runs[-1][1] == day - one:
+                runs[-1] = (runs[-1][0], day)
+            else:
+                runs.append((day, day))
+        day += one
+    return runs
+
+
+def summarize(ranges: list[DayRange]) -> dict:
+    """
+    Order metrics over the given day ranges, one aggregate query.
+    Returns orders_created, orders_paid, gmv (Decimal).
+    """
+    if not ranges:
+        return {"orders_created": 0, "orders_paid": 0, "gmv": Decimal("0")}
+
+    order_window = Q()
+    for a, b in ranges:
+        order_window |= Q(created_at__range=day_bounds(a, b))
+
+    # paid = monetized statuses, by created_at; adjust if you prefer payment_confirmed_at
+    paid = Q(status__in=PAID_LIKE_STATUSES)
+    orders = Order.objects.filter(order_window).aggregate(
+        orders_created=Count("id"),
+        orders_paid=Count("id", filter=paid),
+        gmv=Sum("total", filter=paid),
+    )
+    return {
+        "orders_created": orders["orders_created"],
+        "orders_paid": orders["orders_paid"],
+        "gmv": orders["gmv"] or Decimal("0"),
+    }
+
+
+def refund_totals(start: date, end: date) -> dict:
+    """
+    Refunded / partially refunded payments in [start, end], by updated_at.
+    updated_at is auto_now, so a later write moves a refund to another day:
+    always computed live, never materialized into DailyReport.
+    Returns refunds_count, refunds_paise.
+    """
+    refunds = Payment.objects.filter(
+        updated_at__range=day_bounds(start, end),
+        status__in=[Payment.Status.REFUNDED, Payment.Status.PARTIAL_REFUNDED],
+    ).aggregate(c=Count("id"), s=Sum("refund_amount_paise"))
+    return {"refunds_count": refunds["c"], "refunds_paise": refunds["s"] or 0}
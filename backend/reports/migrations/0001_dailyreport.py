@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-15 23:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('orders_created', models.PositiveIntegerField(default=0)),
+                ('orders_paid', models.PositiveIntegerField(default=0)),
+                ('gmv', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('refunds_count', models.PositiveIntegerField(default=0)),
+                ('refunds_paise', models.BigIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-day'],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-15 23:19
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_dailyreport'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='dailyreport',
+            name='refunds_count',
+        ),
+        migrations.RemoveField(
+            model_name='dailyreport',
+            name='refunds_paise',
+        ),
+    ]
@@ -1,3 +1,63 @@
+import time
+
+from django.core.cache import cache
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from orders.models import Order
+
+
+class DailyReport(models.Model):
+    """
+    Order metrics for one closed day (project TZ), materialized by
+    `manage.py refresh_daily_reports` so /reports/summary only aggregates
+    the days that have no row yet (today, days not refreshed, or days
+    invalidated by a later order change).
+    Refunds are not stored here: they are bucketed by Payment.updated_at,
+    which keeps moving, so the summary computes them live.
+    """
+    day = models.DateField(unique=True)
+    orders_created = models.PositiveIntegerField(default=0)
+    orders_paid = models.PositiveIntegerField(default=0)
+    gmv = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-day"]
+
+    def __str__(self):
+        return f"Daily report {self.day}"
+
+
+# ---- Invalidation ----
+# orders_paid/gmv depend on Order.status (and total), which keep changing after
+# the day closes: any such change drops that day's row so it is aggregated live
+# again, and bumps the version that report cache keys include.
+
+_REPORTS_VERSION_KEY = "reports:version"
+
+# Order fields that feed DailyReport
+_REPORTED_ORDER_FIELDS = {"status", "total", "created_at"}
+
+
+def reports_cache_version() -> int:
+    return cache.get(_REPORTS_VERSION_KEY, 0)
+
+
+def invalidate_order_day(created_at) -> None:
+    """Forget the materialized metrics for the day an order was created on."""
+    day = timezone.localdate(created_at)
+    if day >= timezone.localdate():
+        return  # today is never materialized; open windows use a short TTL
+    DailyReport.objects.filter(day=day).delete()
+    cache.set(_REPORTS_VERSION_KEY, time.time_ns(), None)
+
 
-# Create your models here.
+@receiver([post_save, post_delete], sender=Order)
+def _invalidate_on_order_change(sender, instance, update_fields=None, **kwargs):
+    # Queryset .update() calls bypass this; they must call invalidate_order_day()
+    if update_fields and not _REPORTED_ORDER_FIELDS.intersection(update_fields):
+        return
+    invalidate_order_day(instance.created_at)
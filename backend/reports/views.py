@@ -3,15 +3,19 @@ from __future__ import annotations
 from datetime import datetime, timedelta
 from decimal import Decimal, ROUND_HALF_UP
 
-from django.db.models import Sum, Q, F
+from django.core.cache import cache
+from django.db.models import Sum
 from django.utils import timezone
 from rest_framework.views import APIView
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
 from drf_spectacular.utils import extend_schema
 
-from orders.models import Order, OrderItem
-from payments.models import Payment
+from core.renderers import ORJSONRenderer
+from orders.models import OrderItem
+from .metrics import PAID_LIKE_STATUSES, day_bounds, missing_ranges, refund_totals, summarize
+from .models import DailyReport, reports_cache_version
 from .serializers import (
     ReportsSummaryOutSerializer,
     TopProductsOutSerializer,
@@ -31,8 +35,14 @@ def _parse_date(s: str | None):
         return None
 
 
+_Q2 = Decimal("0.01")
+
+
 def _round2(x: Decimal | float | int) -> Decimal:
-    return Decimal(str(x)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    # aggregates already come back as Decimal; only floats need the str() detour
+    if not isinstance(x, Decimal):
+        x = Decimal(x) if isinstance(x, int) else Decimal(str(x))
+    return x.quantize(_Q2, rounding=ROUND_HALF_UP)
 
 
 def _default_range():
@@ -42,16 +52,9 @@ def _default_range():
     return start, end
 
 
-def _paid_like_statuses():
-    # treat these as monetized for GMV/top-products
-    return [
-        Order.Status.PAID,
-        Order.Status.PICKING,
-        Order.Status.SHIPPED,
-        Order.Status.DELIVERED,
-        Order.Status.RETURNED,
-        Order.Status.REFUNDED,
-    ]
+def _cache_ttl(end) -> int:
+    # Windows reaching today still move; closed past windows are effectively frozen
+    return 60 if end >= timezone.localdate() else 3600
 
 
 class ReportsSummaryView(APIView):
@@ -60,8 +63,11 @@ class ReportsSummaryView(APIView):
 
     GET /api/v1/reports/summary?start=YYYY-MM-DD&end=YYYY-MM-DD
     Returns: orders_created, orders_paid, gmv, aov, refunds_count, refunds_amount
+    Closed days' order metrics are read from DailyReport (see
+    `manage.py refresh_daily_reports`); refunds are always aggregated live.
     """
     permission_classes = [IsAdminUser]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
 
     @extend_schema(responses=ReportsSummaryOutSerializer)
     def get(self, request):
@@ -70,45 +76,53 @@ class ReportsSummaryView(APIView):
         if not start or not end or start > end:
             start, end = _default_range()
 
-        # Normalize range to whole days in the project TZ
-        start_dt = timezone.make_aware(datetime.combine(start, datetime.min.time()), TIMEZONE)
-        end_dt = timezone.make_aware(datetime.combine(end, datetime.max.time()), TIMEZONE)
-
-        # Orders created in window
-        orders_qs = Order.objects.filter(created_at__range=(start_dt, end_dt))
-        orders_created = orders_qs.count()
-
-        # Orders paid in window (by created_at window; adjust if you prefer payment_confirmed_at)
-        paid_qs = orders_qs.filter(status__in=_paid_like_statuses())
-        orders_paid = paid_qs.count()
+        # Dashboards re-poll the same window; the parameter space is tiny
+        cache_key = f"reports:summary:{reports_cache_version()}:{start}:{end}"
+        payload = cache.get(cache_key)
+        if payload is not None:
+            return Response(payload, status=200)
+
+        # Closed days come from materialized DailyReport rows; only days without
+        # a row (today, or never refreshed) are aggregated live
+        totals = {"orders_created": 0, "orders_paid": 0, "gmv": Decimal("0")}
+        closed_end = min(end, timezone.localdate() - timedelta(days=1))
+        have = []
+        for row in DailyReport.objects.filter(day__range=(start, closed_end)).values("day", *totals):
+            have.append(row.pop("day"))
+            for k, v in row.items():
+                totals[k] += v
+        live = summarize(missing_ranges(start, end, have))
+        for k, v in live.items():
+            totals[k] += v
+
+        orders_created = totals["orders_created"]
+        orders_paid = totals["orders_paid"]
 
         # GMV = sum(Order.total) for monetized statuses
-        gmv = paid_qs.aggregate(s=Sum("total")).get("s") or Decimal("0.00")
-        gmv = _round2(gmv)
+        gmv = _round2(totals["gmv"])
 
         # AOV = GMV / orders_paid
         aov = _round2(Decimal("0.00") if orders_paid == 0 else (gmv / Decimal(orders_paid)))
 
-        # Refunds (payments)
-        refund_qs = Payment.objects.filter(
-            updated_at__range=(start_dt, end_dt),
-            status__in=[Payment.Status.REFUNDED, Payment.Status.PARTIAL_REFUNDED],
-        )
-        refunds_count = refund_qs.count()
-        refunds_amount_paise = refund_qs.aggregate(s=Sum("refund_amount_paise")).get("s") or 0
-        refunds_amount = _round2(Decimal(refunds_amount_paise) / Decimal("100"))
+        # Refunds (payments), live over the whole window
+        refunds = refund_totals(start, end)
+        refunds_count = refunds["refunds_count"]
+        refunds_amount = _round2(Decimal(refunds["refunds_paise"]) / Decimal("100"))
 
+        # Built in the serializer's output shape (dates ISO, money as "0.00" strings);
+        # the serializer only documents the schema.
         payload = {
-            "start": start,
-            "end": end,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
             "orders_created": orders_created,
             "orders_paid": orders_paid,
-            "gmv": gmv,
-            "aov": aov,
+            "gmv": str(gmv),
+            "aov": str(aov),
             "refunds_count": refunds_count,
-            "refunds_amount": refunds_amount,
+            "refunds_amount": str(refunds_amount),
         }
-        return Response(ReportsSummaryOutSerializer(payload).data, status=200)
+        cache.set(cache_key, payload, _cache_ttl(end))
+        return Response(payload, status=200)
 
 
 class TopProductsView(APIView):
@@ -118,6 +132,7 @@ class TopProductsView(APIView):
     GET /api/v1/reports/top-products?start=YYYY-MM-DD&end=YYYY-MM-DD&limit=10
     """
     permission_classes = [IsAdminUser]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
 
     @extend_schema(responses=TopProductsOutSerializer)
     def get(self, request):
@@ -132,14 +147,16 @@ class TopProductsView(APIView):
             limit = 10
         limit = max(1, min(limit, 50))
 
-        start_dt = timezone.make_aware(datetime.combine(start, datetime.min.time()), TIMEZONE)
-        end_dt = timezone.make_aware(datetime.combine(end, datetime.max.time()), TIMEZONE)
+        cache_key = f"reports:top-products:{reports_cache_version()}:{start}:{end}:{limit}"
+        out = cache.get(cache_key)
+        if out is not None:
+            return Response(out, status=200)
 
         qs = (
             OrderItem.objects
             .filter(
-                order__created_at__range=(start_dt, end_dt),
-                order__status__in=_paid_like_statuses(),
+                order__created_at__range=day_bounds(start, end),
+                order__status__in=PAID_LIKE_STATUSES,
             )
             .values("sku", "name")
             .annotate(
@@ -149,14 +166,17 @@ class TopProductsView(APIView):
             .order_by("-revenue", "-qty_sold")[:limit]
         )
 
-        items = []
-        for row in qs:
-            items.append({
+        # .values() rows are already dicts; only normalize the aggregates
+        items = [
+            {
                 "sku": row["sku"],
                 "name": row["name"],
                 "qty_sold": row["qty_sold"] or 0,
-                "revenue": _round2(row["revenue"] or Decimal("0.00")),
-            })
-
-        out = {"start": start, "end": end, "limit": limit, "items": items}
-        return Response(TopProductsOutSerializer(out).data, status=200)
+                "revenue": str(_round2(row["revenue"] or 0)),
+            }
+            for row in qs
+        ]
+
+        out = {"start": start.isoformat(), "end": end.isoformat(), "limit": limit, "items": items}
+        cache.set(cache_key, out, _cache_ttl(end))
+        return Response(out, status=200)
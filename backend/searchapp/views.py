@@ -1,10 +1,26 @@
+import json
+from itertools import islice
 from typing import List, Dict, Any, Optional
-from django.db.models import Min, Prefetch, Q
+from urllib.parse import quote
+
+try:
+    import orjson  # optional: faster NDJSON lines
+except Exception:  # pragma: no cover
+    orjson = None
+
+from django.core.cache import cache
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db import connection
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.expressions import RawSQL
 from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 
-from catalog.models import Product, ProductVariant, ProductImage
+from catalog.models import Product, ProductImage, ProductVariant
+from core.renderers import ORJSONRenderer
 from .serializers import ProductHitSerializer, SuggestionOutSerializer
 
 
@@ -34,12 +50,81 @@ def _abs_url(request, maybe_file_or_url: Optional[str]) -> str:
     return request.build_absolute_uri(url)
 
 
+def _build_hits(request, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Search hit dicts (ProductHitSerializer input) for a batch of .values() product rows."""
+    # Primary images for just these rows (at most one per product), keyed by product
+    images = {
+        row["product_id"]: row
+        for row in ProductImage.objects
+        .filter(is_primary=True, product_id__in=[p["id"] for p in rows])
+        .values("product_id", "id", "image", "alt_text")
+    } if rows else {}
+    image_storage = ProductImage._meta.get_field("image").storage
+
+    results: List[Dict[str, Any]] = []
+    for p in rows:
+        pim = images.get(p["id"])
+
+        primary_image = None
+        if pim:
+            primary_image = {
+                "id": pim["id"],
+                # stored name -> URL straight from storage, no FieldFile wrapper
+                "image": _abs_url(request, image_storage.url(pim["image"]) if pim["image"] else ""),
+                "alt_text": pim["alt_text"] or "",
+            }
+
+        results.append({
+            "id": p["id"],
+            "name": p["name"],
+            "slug": p["slug"],
+            "brand": p["brand"] or "",
+            "category": (
+                {"name": p["category__name"], "slug": p["category__slug"]}
+                if p["category_id"] else None
+            ),
+            "min_price": p["min_price"] or 0,
+            "primary_image": primary_image,
+        })
+    return results
+
+
+def _dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _stream_hits(request, rows, chunk_size: int = 100):
+    """NDJSON lines for every row, built one chunk at a time (flat memory)."""
+    it = rows.iterator(chunk_size=chunk_size)
+    while batch := list(islice(it, chunk_size)):
+        for hit in ProductHitSerializer(_build_hits(request, batch), many=True).data:
+            yield _dumps(hit) + b"\n"
+
+
+# stream=1 is open to anonymous clients: cap how many rows one response can export
+_STREAM_MAX_ROWS = 1000
+
+
+# Suggestion cache: only short (typed-prefix) queries are worth keeping
+_SUGGEST_CACHE_TTL = 300
+_SUGGEST_CACHE_MAX_Q = 32
+
+
 class SearchView(APIView):
     """
     GET /api/v1/search
-      ?q=&brand=&category=&price_min=&price_max=&limit=&offset=
-    Returns: { count, next_offset, prev_offset, results: [...] }
+      ?q=&brand=&category=&price_min=&price_max=&limit=&offset=&with_count=
+    Returns: { has_more, next_offset, prev_offset, results: [...] }
+    (plus "count" only when with_count=1; it costs a second pass over the filter)
+    stream=1 returns matches from offset as NDJSON (one hit per line), capped at
+    _STREAM_MAX_ROWS rows per response; page with offset for more.
+    On Postgres q is a full-text (websearch syntax) query ranked by relevance;
+    other backends fall back to substring matching on name/brand/description.
     """
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+
     def get(self, request):
         q = (request.GET.get("q") or "").strip()
         brand = (request.GET.get("brand") or "").strip()
@@ -50,27 +135,37 @@ class SearchView(APIView):
         limit = min(max(_parse_int(request.GET.get("limit"), 12), 1), 50)
         offset = max(_parse_int(request.GET.get("offset"), 0), 0)
 
-        # Annotate min_price = min(variant.price_sale or variant.price_mrp)
-        variant_prices = Coalesce(Min("variants__price_sale"), Min("variants__price_mrp"))
-
-        # Prefetch only the primary image (to_attr gives us a list on each product)
-        primary_image_qs = ProductImage.objects.filter(is_primary=True).order_by("id")
+        # Annotate min_price = min(variant.price_sale or variant.price_mrp), as
+        # correlated subqueries: no variants join / GROUP BY on the main query
+        variants = ProductVariant.objects.filter(product=OuterRef("pk"))
+        variant_prices = Coalesce(
+            Subquery(variants.filter(price_sale__isnull=False).order_by("price_sale").values("price_sale")[:1]),
+            Subquery(variants.order_by("price_mrp").values("price_mrp")[:1]),
+        )
 
         qs = (
             Product.objects
-            .select_related("category")
             .filter(status=Product.Status.ACTIVE)  # 🔹 Only active products in search
-            .prefetch_related(
-                Prefetch(
-                    "variants",
-                    queryset=ProductVariant.objects.only("id", "product_id", "price_mrp", "price_sale"),
-                ),
-                Prefetch("images", queryset=primary_image_qs, to_attr="_primary_images"),
-            )
             .annotate(min_price=variant_prices)
         )
 
-        if q:
+        ordering = ("name",)
+        if q and connection.vendor == "postgresql":
+            # Full-text match on the trigger-maintained, GIN-indexed search_vector,
+            # best matches first. A raw column: it is not a Product field (see
+            # catalog migration 0005)
+            query = SearchQuery(q, search_type="websearch", config="english")
+            vector = RawSQL(
+                f'{connection.ops.quote_name(Product._meta.db_table)}."search_vector"', (),
+                output_field=SearchVectorField(),
+            )
+            qs = (
+                qs.annotate(search_vector=vector)
+                .filter(search_vector=query)
+                .annotate(rank=SearchRank(F("search_vector"), query))
+            )
+            ordering = ("-rank", "name")
+        elif q:
             qs = qs.filter(
                 Q(name__icontains=q) |
                 Q(brand__icontains=q) |
@@ -92,43 +187,32 @@ class SearchView(APIView):
             except Exception:
                 pass
 
-        qs = qs.order_by("name").distinct()
-
-        total = qs.count()
-        page = list(qs[offset: offset + limit])
-
-        results: List[Dict[str, Any]] = []
-        for p in page:
-            pim = getattr(p, "_primary_images", None)
-            pim = pim[0] if pim else None
-
-            primary_image = None
-            if pim:
-                primary_image = {
-                    "id": pim.id,
-                    "image": _abs_url(request, pim.image),  # absolute URL string
-                    "alt_text": pim.alt_text or "",
-                }
-
-            results.append({
-                "id": p.id,
-                "name": p.name,
-                "slug": p.slug,
-                "brand": p.brand or "",
-                "category": (
-                    {"name": p.category.name, "slug": p.category.slug}
-                    if p.category_id else None
-                ),
-                "min_price": p.min_price or 0,
-                "primary_image": primary_image,
-            })
+        # No multi-valued joins anywhere, so rows are unique without DISTINCT
+        # Plain dict rows: the response is flattened anyway, so skip model hydration
+        qs = qs.order_by(*ordering).values(
+            "id", "name", "slug", "brand", "category_id", "category__name", "category__slug", "min_price",
+        )
+
+        if request.GET.get("stream") in ("1", "true"):
+            # Export mode: up to _STREAM_MAX_ROWS matches from offset on, one JSON hit per line
+            rows = qs[offset:offset + _STREAM_MAX_ROWS]
+            return StreamingHttpResponse(_stream_hits(request, rows), content_type="application/x-ndjson")
+
+        # One extra row tells us whether there is a next page, without a COUNT(*)
+        page = list(qs[offset: offset + limit + 1])
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        results = _build_hits(request, page)
 
         payload = {
-            "count": total,
-            "next_offset": (offset + limit) if (offset + limit) < total else None,
+            "has_more": has_more,
+            "next_offset": (offset + limit) if has_more else None,
             "prev_offset": (offset - limit) if (offset - limit) >= 0 else None,
             "results": ProductHitSerializer(results, many=True, context={"request": request}).data,
         }
+        if request.GET.get("with_count") in ("1", "true"):
+            payload["count"] = qs.count()
         return Response(payload)
 
 
@@ -137,14 +221,24 @@ class SuggestView(APIView):
     GET /api/v1/search/suggest?q=
     Returns: { suggestions: ["…"] }
     Strategy:
-      - Top 8 product names that start with q (istartswith)
-      - Fallback to icontains if < 8
+      - Top 8 product names containing q, names that start with q first
     """
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+
     def get(self, request):
         q = (request.GET.get("q") or "").strip()
         if not q:
             return Response(SuggestionOutSerializer({"suggestions": []}).data)
 
+        # Autocomplete fires per keystroke; matching is case-insensitive, so cache
+        # by lowercased q (quoted: cache keys must not contain spaces)
+        q = q.lower()
+        cache_key = f"search:suggest:{quote(q)}" if len(q) <= _SUGGEST_CACHE_MAX_Q else None
+        if cache_key:
+            names = cache.get(cache_key)
+            if names is not None:
+                return Response(SuggestionOutSerializer({"suggestions": names}).data)
+
         base = (
             Product.objects
             .filter(status=Product.Status.ACTIVE)  # 🔹 Only active products for suggestions
@@ -152,13 +246,16 @@ class SuggestView(APIView):
             .order_by("name")
         )
 
-        names = list(base.filter(name__istartswith=q).values_list("name", flat=True)[:8])
-        if len(names) < 8:
-            extra = list(
-                base.filter(name__icontains=q)
-                .exclude(name__in=names)
-                .values_list("name", flat=True)[: 8 - len(names)]
-            )
-            names.extend(extra)
+        # One query: prefix matches rank ahead of other substring matches
+        # (istartswith implies icontains, so one filter covers both)
+        names = list(
+            base.filter(name__icontains=q)
+            .annotate(prio=Case(When(name__istartswith=q, then=Value(0)), default=Value(1), output_field=IntegerField()))
+            .order_by("prio", "name")
+            .values_list("name", flat=True)[:8]
+        )
+        if cache_key:
+            # short TTL instead of invalidation; new/renamed products show up soon enough
+            cache.set(cache_key, names, _SUGGEST_CACHE_TTL)
 
         return Response(SuggestionOutSerializer({"suggestions": names}).data)
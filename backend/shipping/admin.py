@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
-from .models import ShippingMethod, Shipment
+from core.admin_helpers import is_changelist
+from .models import AppendEvent, LastEventKey, ShippingMethod, Shipment
 
 @admin.register(ShippingMethod)
 class ShippingMethodAdmin(admin.ModelAdmin):
@@ -14,24 +16,12 @@ class ShippingMethodAdmin(admin.ModelAdmin):
 # ---- Shipment helpers ----
 
 def _advance_queryset(qs, to_status: str) -> int:
-    updated = 0
-    for shp in qs:
-        # enforce allowed transitions roughly like in the view; keep simple here
-        allowed = {
-            "created": {"picked"},
-            "picked": {"in_transit"},
-            "in_transit": {"delivered", "returned"},
-            "delivered": set(),
-            "returned": set(),
-        }.get(shp.status, set())
-        if to_status in allowed:
-            ev = list(shp.events or [])
-            ev.append({"ts": shp.created_at.isoformat(), "event": f"status:{to_status}"})
-            shp.status = to_status
-            shp.events = ev
-            shp.save(update_fields=["status", "events"])
-            updated += 1
-    return updated
+    sources = [cur for cur, nxt in Shipment.ALLOWED_TRANSITIONS.items() if to_status in nxt]
+    # One UPDATE for the whole selection; the event is appended by the database
+    return qs.filter(status__in=sources).update(
+        status=to_status,
+        events=AppendEvent({"ts": timezone.now().isoformat(), "event": f"status:{to_status}"}),
+    )
 
 @admin.action(description="Advance → Picked")
 def action_mark_picked(modeladmin, request, queryset):
@@ -70,12 +60,28 @@ class ShipmentAdmin(admin.ModelAdmin):
         action_mark_returned,
     ]
 
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        if is_changelist(request):
+            # The list only shows the last event: pull its two keys in SQL
+            # instead of shipping every row's whole events array
+            qs = qs.annotate(
+                last_event_label=LastEventKey("event"),
+                last_event_ts=LastEventKey("ts"),
+            ).defer("events")
+        return qs
+
     def last_event(self, obj: Shipment):
-        ev = (obj.events or [])
-        if not ev:
-            return "-"
-        e = ev[-1]
-        label = e.get("event", "")
-        ts = e.get("ts", "")
-        return format_html("<span title='{}'>{}</span>", ts, label)
+        if hasattr(obj, "last_event_label"):
+            label, ts = obj.last_event_label, obj.last_event_ts
+            if label is None and ts is None:
+                return "-"
+        else:
+            ev = (obj.events or [])
+            if not ev:
+                return "-"
+            e = ev[-1]
+            label = e.get("event", "")
+            ts = e.get("ts", "")
+        return format_html("<span title='{}'>{}</span>", ts or "", label or "")
     last_event.short_description = "Last event"
@@ -1,5 +1,10 @@
+import json
+import time
 from decimal import Decimal
-from django.db import models
+from django.core.cache import cache
+from django.db import NotSupportedError, models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 
@@ -36,6 +41,67 @@ class ShippingMethod(models.Model):
         return f"{self.name} ({self.code})"
 
 
+# Cached shipping quotes embed this version in their keys; bumping it on any
+# ShippingMethod change retires them all at once (queryset .update() bypasses
+# signals, the quote TTL bounds that case).
+_METHODS_VERSION_KEY = "shipping:methods:version"
+
+
+def methods_cache_version() -> int:
+    return cache.get(_METHODS_VERSION_KEY, 0)
+
+
+@receiver([post_save, post_delete], sender=ShippingMethod)
+def _bump_methods_cache_version(sender, **kwargs):
+    cache.set(_METHODS_VERSION_KEY, time.time_ns(), None)
+
+
+class AppendEvent(models.Func):
+    """
+    events with one event appended, computed by the database, so an UPDATE can
+    add to Shipment.events without reading the array into Python first.
+    """
+    output_field = models.JSONField()
+
+    def __init__(self, event: dict, field: str = "events"):
+        super().__init__(models.F(field), models.Value(json.dumps(event)))
+
+    def _compile(self, compiler, template: str):
+        field, event = self.get_source_expressions()
+        field_sql, field_params = compiler.compile(field)
+        event_sql, event_params = compiler.compile(event)
+        return template % {"field": field_sql, "event": event_sql}, (*field_params, *event_params)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(f"AppendEvent is not implemented for {connection.vendor}")
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self._compile(compiler, "(COALESCE(%(field)s, '[]'::jsonb) || jsonb_build_array(%(event)s::jsonb))")
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self._compile(compiler, "json_insert(COALESCE(%(field)s, '[]'), '$[#]', json(%(event)s))")
+
+
+class LastEventKey(models.Func):
+    """events[-1][key] as text, read in the database (the array itself stays there)."""
+    output_field = models.CharField()
+
+    def __init__(self, key: str, field: str = "events"):
+        self.key = key
+        super().__init__(models.F(field))
+
+    def as_sql(self, compiler, connection, **extra_context):
+        raise NotSupportedError(f"LastEventKey is not implemented for {connection.vendor}")
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        field_sql, params = compiler.compile(self.get_source_expressions()[0])
+        return f"({field_sql} -> -1 ->> %s)", (*params, self.key)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        field_sql, params = compiler.compile(self.get_source_expressions()[0])
+        return f"json_extract({field_sql}, %s)", (*params, f"$[#-1].{self.key}")
+
+
 class Shipment(models.Model):
     STATUS = [
         ("created", "Created"),
@@ -45,6 +111,15 @@ class Shipment(models.Model):
         ("returned", "Returned"),
     ]
 
+    # Linear flow; shared by the API's advance action and the admin bulk actions
+    ALLOWED_TRANSITIONS = {
+        "created": {"picked"},
+        "picked": {"in_transit"},
+        "in_transit": {"delivered", "returned"},
+        "delivered": set(),
+        "returned": set(),
+    }
+
     order = models.ForeignKey("orders.Order", on_delete=models.CASCADE, related_name="shipments")
     method = models.ForeignKey(ShippingMethod, on_delete=models.PROTECT)
     carrier = models.CharField(max_length=60, blank=True)
@@ -1,13 +1,18 @@
 from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Value, When
 from django.utils import timezone
 from rest_framework import permissions, status, viewsets, serializers as rf_serializers
 from rest_framework.views import APIView
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAdminUser
 from drf_spectacular.utils import extend_schema
 
-from .models import ShippingMethod, Shipment
+from core.renderers import ORJSONRenderer
+
+from .models import AppendEvent, ShippingMethod, Shipment, methods_cache_version
 from .serializers import (
     ShippingQuoteInSerializer, ShippingMethodQuoteSerializer,
     ShipmentCreateUpdateSerializer, ShipmentOutSerializer
@@ -23,15 +28,6 @@ except Exception:
         pass
 # ----------------------------------------------------------------------
 
-ALLOWED_TRANSITIONS = {
-    "created": {"picked"},
-    "picked": {"in_transit"},
-    "in_transit": {"delivered", "returned"},
-    "delivered": set(),
-    "returned": set(),
-}
-
-
 # ----- Inline input serializers for action endpoints -----
 class _SetTrackingInSerializer(rf_serializers.Serializer):
     carrier = rf_serializers.CharField(required=False, allow_blank=True)
@@ -43,8 +39,12 @@ class _AdvanceInSerializer(rf_serializers.Serializer):
 
 
 # ----- Quote -----
+_QUOTE_CACHE_TTL = 60
+
+
 class QuoteView(APIView):
     permission_classes = [permissions.AllowAny]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     serializer_class = ShippingQuoteInSerializer  # helps schema
 
     @extend_schema(
@@ -62,26 +62,32 @@ class QuoteView(APIView):
         if subtotal < 0 or total_weight < 0:
             return Response({"detail": "subtotal/weight cannot be negative"}, status=400)
 
-        out = []
-        for m in ShippingMethod.objects.filter(is_active=True):
-            rate = Decimal(m.base_rate or 0)
-
-            # weight-based adder if configured
-            if (m.per_kg or Decimal("0")) > 0 and total_weight > 0:
-                rate += (Decimal(m.per_kg) * total_weight)
-
-            # free-over logic
-            if m.free_over and subtotal >= m.free_over:
-                rate = Decimal("0.00")
-
-            out.append({
-                "id": m.id,
-                "name": m.name,
-                "code": m.code,
-                "rate": rate.quantize(Decimal("0.01")),
-            })
-
-        return Response(ShippingMethodQuoteSerializer(out, many=True).data, status=200)
+        # Checkout re-quotes the same cart constantly; inputs are exact to the
+        # cent / gram, and the version retires entries when a method changes
+        cache_key = (
+            f"shipping:quote:{methods_cache_version()}:"
+            f"{int(subtotal * 100)}:{int(total_weight * 1000)}"
+        )
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data, status=200)
+
+        # Rate computed in SQL: free when free_over (> 0) is reached, else
+        # base_rate + per_kg * weight
+        money = DecimalField(max_digits=12, decimal_places=2)
+        out = list(
+            ShippingMethod.objects.filter(is_active=True)
+            .annotate(rate=Case(
+                When(free_over__gt=0, free_over__lte=subtotal, then=Value(Decimal("0.00"))),
+                default=ExpressionWrapper(F("base_rate") + F("per_kg") * Value(total_weight), output_field=money),
+                output_field=money,
+            ))
+            .values("id", "name", "code", "rate")
+        )
+
+        data = ShippingMethodQuoteSerializer(out, many=True).data
+        cache.set(cache_key, data, _QUOTE_CACHE_TTL)
+        return Response(data, status=200)
 
 
 # ----- Shipments (admin) -----
@@ -103,15 +109,18 @@ class ShipmentViewSet(viewsets.ModelViewSet):
         shp.carrier = request.data.get("carrier", shp.carrier)
         shp.tracking_no = request.data.get("tracking_no", shp.tracking_no)
 
-        ev = list(shp.events or [])
-        ev.append({
-            "ts": timezone.now().isoformat(),
-            "event": "tracking_set",
-            "carrier": shp.carrier,
-            "tracking_no": shp.tracking_no,
-        })
-        shp.events = ev
-        shp.save(update_fields=["carrier", "tracking_no", "events"])
+        # Append server-side: no read-modify-write of the whole events array
+        Shipment.objects.filter(pk=shp.pk).update(
+            carrier=shp.carrier,
+            tracking_no=shp.tracking_no,
+            events=AppendEvent({
+                "ts": timezone.now().isoformat(),
+                "event": "tracking_set",
+                "carrier": shp.carrier,
+                "tracking_no": shp.tracking_no,
+            }),
+        )
+        shp.refresh_from_db(fields=["events"])
         return Response(ShipmentOutSerializer(shp).data)
 
     @extend_schema(request=_AdvanceInSerializer, responses=ShipmentOutSerializer)
@@ -126,15 +135,19 @@ class ShipmentViewSet(viewsets.ModelViewSet):
         if next_status not in dict(Shipment.STATUS):
             return Response({"detail": "invalid status"}, status=400)
 
-        allowed = ALLOWED_TRANSITIONS.get(shp.status, set())
+        allowed = Shipment.ALLOWED_TRANSITIONS.get(shp.status, set())
         if next_status not in allowed:
             return Response({"detail": f"invalid transition: {shp.status} → {next_status}"}, status=409)
 
-        shp.status = next_status
-        ev = list(shp.events or [])
-        ev.append({"ts": timezone.now().isoformat(), "event": f"status:{next_status}"})
-        shp.events = ev
-        shp.save(update_fields=["status", "events"])
+        # Conditional on the status we validated against, so two concurrent
+        # advances cannot both apply; the event is appended in the same UPDATE
+        moved = Shipment.objects.filter(pk=shp.pk, status=shp.status).update(
+            status=next_status,
+            events=AppendEvent({"ts": timezone.now().isoformat(), "event": f"status:{next_status}"}),
+        )
+        if not moved:
+            return Response({"detail": "shipment status changed concurrently"}, status=409)
+        shp.refresh_from_db(fields=["status", "events"])
 
         # Notify on shipped and delivered (safe no-ops if notifications missing)
         try:
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-15 23:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_alter_address_options'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['user', '-is_default', '-id'], name='addr_user_def_id'),
+        ),
+        migrations.RemoveIndex(
+            model_name='address',
+            name='users_addre_user_id_194804_idx',
+        ),
+    ]
@@ -21,7 +21,8 @@ class Address(models.Model):
         verbose_name_plural = "Addresses"          # ← fixes "Addresss"
         ordering = ["-is_default", "-created_at"]
         indexes = [
-            models.Index(fields=["user", "is_default"]),
+            # matches AddressViewSet's filter + ORDER BY (also covers user/is_default lookups)
+            models.Index(fields=["user", "-is_default", "-id"], name="addr_user_def_id"),
             models.Index(fields=["user", "created_at"]),
         ]
         # Ensure at most ONE default per user
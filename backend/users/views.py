@@ -1,4 +1,5 @@
 from django.contrib.auth.models import User
+from django.db import transaction
 from rest_framework import generics, permissions, viewsets, decorators, response, status
 from .serializers import RegisterSerializer, UserSerializer, AddressSerializer
 from .models import Address
@@ -15,27 +16,40 @@ class MeView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return self.request.user
 
+def _clear_default(user, keep_id=None):
+    # touches only the (at most one) current default row, not every address
+    qs = Address.objects.filter(user=user, is_default=True)
+    if keep_id is not None:
+        qs = qs.exclude(id=keep_id)
+    qs.update(is_default=False)
+
+
 class AddressViewSet(viewsets.ModelViewSet):
     serializer_class = AddressSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        # Defaults first, newest first
+        # Defaults first, newest first; served by the (user, -is_default, -id) index.
+        # The serializer only emits user as its id, so no join is needed.
         return (
             Address.objects.filter(user=self.request.user)
             .order_by("-is_default", "-id")
-            .select_related("user")
         )
 
+    # At most one default per user is a partial unique index, checked row by row,
+    # so the old default has to be cleared *before* the new one is written
+    # (a single CASE UPDATE can trip it depending on row order).
     def perform_create(self, serializer):
-        obj = serializer.save(user=self.request.user)
-        if obj.is_default:
-            Address.objects.filter(user=self.request.user).exclude(id=obj.id).update(is_default=False)
+        with transaction.atomic():
+            if serializer.validated_data.get("is_default"):
+                _clear_default(self.request.user)
+            serializer.save(user=self.request.user)
 
     def perform_update(self, serializer):
-        obj = serializer.save()
-        if obj.is_default:
-            Address.objects.filter(user=self.request.user).exclude(id=obj.id).update(is_default=False)
+        with transaction.atomic():
+            if serializer.validated_data.get("is_default"):
+                _clear_default(self.request.user, keep_id=serializer.instance.id)
+            serializer.save()
 
     @decorators.action(detail=True, methods=["post"])
     def set_default(self, request, pk=None):
@@ -48,7 +62,8 @@ class AddressViewSet(viewsets.ModelViewSet):
             return response.Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
 
         if not addr.is_default:
-            Address.objects.filter(user=request.user).update(is_default=False)
-            addr.is_default = True
-            addr.save(update_fields=["is_default"])
+            with transaction.atomic():
+                _clear_default(request.user)
+                addr.is_default = True
+                addr.save(update_fields=["is_default"])
         return response.Response(AddressSerializer(addr).data)
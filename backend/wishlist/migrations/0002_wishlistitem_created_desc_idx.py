@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-15 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wishlist', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='wishlistitem',
+            index=models.Index(fields=['wishlist', '-created_at'], name='wli_wl_created_desc'),
+        ),
+        migrations.RemoveIndex(
+            model_name='wishlistitem',
+            name='wishlist_wi_wishlis_81d127_idx',
+        ),
+    ]
@@ -41,7 +41,8 @@ class WishlistItem(models.Model):
 
     class Meta:
         indexes = [
-            models.Index(fields=["wishlist", "created_at"]),
+            # matches the list view's ORDER BY -created_at within one wishlist
+            models.Index(fields=["wishlist", "-created_at"], name="wli_wl_created_desc"),
             models.Index(fields=["wishlist", "variant"]),
             models.Index(fields=["wishlist", "product"]),
         ]
@@ -93,5 +94,8 @@ class WishlistItem(models.Model):
             pass
 
     def save(self, *args, **kwargs):
-        self.full_clean()
+        # Invariants live in the DB constraints above (forms/admin still run clean());
+        # keep only clean()'s normalization so product stays in sync with variant.
+        if self.variant_id and not self.product_id:
+            self.product_id = ProductVariant.objects.values_list("product_id", flat=True).get(pk=self.variant_id)
         return super().save(*args, **kwargs)
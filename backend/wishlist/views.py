@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from rest_framework import generics, status
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max
+from rest_framework import generics, serializers, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
@@ -8,8 +11,29 @@ from .models import Wishlist, WishlistItem
 from .serializers import WishlistItemIn, WishlistItemOut
 
 
-def _get_wishlist(user):
-    wishlist, _ = Wishlist.objects.get_or_create(user=user)
+_LIST_CACHE_TTL = 300
+
+# same formatting (project TZ, DATETIME_FORMAT) WishlistItemOut applies to created_at
+_DATETIME = serializers.DateTimeField()
+
+
+# request.user is a fresh instance per request, so these memos are request-scoped
+
+def _get_wishlist_or_none(user):
+    """Read-only lookup: viewing an empty wishlist must not create one."""
+    wishlist = getattr(user, "_wishlist_cache", None)
+    if wishlist is None:
+        wishlist = Wishlist.objects.filter(user=user).first()
+        if wishlist is not None:
+            user._wishlist_cache = wishlist
+    return wishlist
+
+
+def _get_or_create_wishlist(user):
+    wishlist = getattr(user, "_wishlist_cache", None)
+    if wishlist is None:
+        wishlist, _ = Wishlist.objects.get_or_create(user=user)
+        user._wishlist_cache = wishlist
     return wishlist
 
 
@@ -18,31 +42,60 @@ class WishlistListCreateView(generics.GenericAPIView):
     serializer_class = WishlistItemIn
 
     def get(self, request):
-        w = _get_wishlist(request.user)
+        w = _get_wishlist_or_none(request.user)
+        if w is None:
+            return Response([], status=status.HTTP_200_OK)
+
+        # Items are only ever added or removed, and either changes (count, newest
+        # created_at), so those two scalars version the cached list
+        stats = w.items.aggregate(c=Count("id"), m=Max("created_at"))
+        cache_key = f"wishlist:{w.id}:{stats['c']}:{stats['m'].timestamp() if stats['m'] else 0}"
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK)
+
+        # WishlistItemOut only exposes the FK ids, so no joins and no extra columns
+        # (wishlist_id stays: the related manager sets it on every row)
         qs = (
-            w.items.select_related("product", "variant")
+            w.items.only("id", "wishlist_id", "product_id", "variant_id", "created_at")
             .order_by("-created_at")
         )
-        return Response(WishlistItemOut(qs, many=True).data, status=status.HTTP_200_OK)
+        data = WishlistItemOut(qs, many=True).data
+        cache.set(cache_key, data, _LIST_CACHE_TTL)
+        return Response(data, status=status.HTTP_200_OK)
 
     def post(self, request):
-        w = _get_wishlist(request.user)
+        w = _get_or_create_wishlist(request.user)
         ser = self.get_serializer(data=request.data)  # includes request in context
         ser.is_valid(raise_exception=True)
 
-        # race-safe insert even if two requests try to add the same item
-        obj, created = WishlistItem.objects.get_or_create(
-            wishlist=w,
-            product_id=ser.validated_data.get("product_id"),
-            variant_id=ser.validated_data.get("variant_id"),
-        )
-        if not created:
-            # serializer already guards duplicates, but if a race sneaks in:
+        # Insert-first dedup: adding a new item is a single INSERT; the partial
+        # unique constraints reject duplicates (race-safe), and only then do we look
+        lookup = {
+            "wishlist": w,
+            "product_id": ser.validated_data.get("product_id"),
+            "variant_id": ser.validated_data.get("variant_id"),
+        }
+        try:
+            with transaction.atomic():  # savepoint: a conflict must not poison an outer transaction
+                obj = WishlistItem.objects.create(**lookup)
+        except IntegrityError:
+            if not WishlistItem.objects.filter(**lookup).exists():
+                raise  # not a duplicate; some other constraint failed
             return Response(
                 {"detail": "This item is already in your wishlist."},
                 status=status.HTTP_200_OK,
             )
-        return Response(WishlistItemOut(obj).data, status=status.HTTP_201_CREATED)
+        # Four known fields: build the WishlistItemOut shape directly
+        return Response(
+            {
+                "id": obj.id,
+                "product_id": obj.product_id,
+                "variant_id": obj.variant_id,
+                "created_at": _DATETIME.to_representation(obj.created_at),
+            },
+            status=status.HTTP_201_CREATED,
+        )
 
 
 class WishlistItemDeleteView(generics.DestroyAPIView):
@@ -54,5 +107,5 @@ class WishlistItemDeleteView(generics.DestroyAPIView):
     lookup_url_kwarg = "item_id"
 
     def get_queryset(self):
-        w = _get_wishlist(self.request.user)
-        return w.items.all()
+        # Scope through the join; no need to fetch (or create) the Wishlist itself
+        return WishlistItem.objects.filter(wishlist__user=self.request.user)
@@ -28,7 +28,7 @@ export default function SearchResultsPage() {
   const page = Math.max(1, parseInt(sp.get("page") || "1", 10) || 1);
 
   const [items, setItems] = useState([]);
-  const [count, setCount] = useState(0);
+  const [hasMore, setHasMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [err, setErr] = useState("");
 
@@ -57,11 +57,11 @@ export default function SearchResultsPage() {
         const r = await api.get("/search", { params });
         const data = r.data || {};
         setItems(Array.isArray(data.results) ? data.results : []);
-        setCount(Number(data.count || 0));
+        setHasMore(Boolean(data.has_more));
       } catch (e) {
         setErr(e?.response?.data?.detail || "Could not load results.");
         setItems([]);
-        setCount(0);
+        setHasMore(false);
       } finally {
         setLoading(false);
       }
@@ -89,12 +89,12 @@ export default function SearchResultsPage() {
     ? `Category: ${category}`
     : "Products";
 
-  const pageCount = count ? Math.max(1, Math.ceil(count / PAGE_SIZE)) : 1;
-  const startIdx = count ? (page - 1) * PAGE_SIZE + 1 : null;
-  const endIdx = count ? Math.min(page * PAGE_SIZE, count) : null;
+  // /search returns has_more instead of a total count
+  const startIdx = items.length ? (page - 1) * PAGE_SIZE + 1 : null;
+  const endIdx = items.length ? (page - 1) * PAGE_SIZE + items.length : null;
 
   const canPrev = page > 1;
-  const canNext = page < pageCount;
+  const canNext = hasMore;
 
   return (
     <div className="grid md:grid-cols-[16rem,1fr] gap-6">
@@ -113,9 +113,9 @@ export default function SearchResultsPage() {
         <div className="flex items-end justify-between gap-3 mb-3">
           <div>
             <h1 className="text-xl font-semibold">{title}</h1>
-            {count > 0 && startIdx && endIdx && (
+            {startIdx && endIdx && (
               <div className="text-xs text-gray-600">
-                Showing {startIdx}-{endIdx} of {count}
+                Showing {startIdx}-{endIdx}
               </div>
             )}
           </div>
@@ -213,7 +213,7 @@ export default function SearchResultsPage() {
                 Prev
               </button>
               <span className="text-sm">
-                Page <b>{page}</b> of <b>{pageCount}</b>
+                Page <b>{page}</b>
               </span>
               <button
                 className="rounded border px-3 py-1 text-sm disabled:opacity-50"